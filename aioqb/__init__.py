@@ -3,13 +3,42 @@ Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
 """
 # https://github.com/qbittorrent/qBittorrent/wiki/WebUI-API-(qBittorrent-4.1)#general-information
 
+from aioqb.ban import BanEngine, PeerMatcher
+from aioqb.batching import WriteBatcher
+from aioqb.bencode import TorrentMetainfo, read_metainfo
+from aioqb.cache import ResponseCache
+from aioqb.chunking import ChunkedResult
 from aioqb.client import QbittorrentClient as Client
+from aioqb.client import create_connector, pool_stats
+from aioqb.columnar import TorrentTable
+from aioqb.events import (
+    CategoryChanged,
+    EventBus,
+    SpeedThresholdCrossed,
+    StateChanged,
+    Subscription,
+    TagsChanged,
+    TorrentAdded,
+    TorrentCompleted,
+    TorrentEvent,
+    TorrentRemoved,
+)
 from aioqb.exceptions import (
     ApiFailedException,
     BaseQbittorrentException,
+    CircuitOpenException,
     HashNotFoundException,
     IPBanedException,
 )
+from aioqb.fleet import FleetClient, FleetResult
+from aioqb.index import TorrentIndex
+from aioqb.limiter import ConcurrencyLimiter
+from aioqb.magnet import magnet_hash
+from aioqb.placement import HashRing, Placement
+from aioqb.resilience import CircuitBreaker, RetryPolicy
+from aioqb.sync import MainDataMirror, MirrorListener, PeerMirror
+from aioqb.tail import LogTailer
+from aioqb.waiters import TorrentWaiter
 
 __version__ = "0.1.6"
 __all__ = [
@@ -18,4 +47,39 @@ __all__ = [
     "IPBanedException",
     "HashNotFoundException",
     "ApiFailedException",
+    "CircuitOpenException",
+    "MainDataMirror",
+    "PeerMirror",
+    "MirrorListener",
+    "TorrentIndex",
+    "TorrentTable",
+    "EventBus",
+    "Subscription",
+    "TorrentEvent",
+    "TorrentAdded",
+    "TorrentRemoved",
+    "TorrentCompleted",
+    "StateChanged",
+    "CategoryChanged",
+    "TagsChanged",
+    "SpeedThresholdCrossed",
+    "BanEngine",
+    "PeerMatcher",
+    "LogTailer",
+    "create_connector",
+    "pool_stats",
+    "ResponseCache",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "ConcurrencyLimiter",
+    "FleetClient",
+    "FleetResult",
+    "Placement",
+    "HashRing",
+    "ChunkedResult",
+    "WriteBatcher",
+    "TorrentMetainfo",
+    "read_metainfo",
+    "magnet_hash",
+    "TorrentWaiter",
 ]
@@ -0,0 +1,149 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+import re
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set
+
+from aioqb.sync import MainDataMirror, PeerMirror
+
+if TYPE_CHECKING:
+    from aioqb.client import _BaseQbittorrentClient
+
+PeerRule = Callable[[dict], bool]
+
+DEFAULT_CLIENT_PATTERNS = ("xl", "xunlei", "thunder")
+DEFAULT_PEER_ID_PREFIXES = ("-XL", "-SD", "-XF", "-QD")
+
+
+class PeerMatcher:
+    """
+    Client string, peer id prefix and behaviour rules compiled once into a
+    single matcher
+    """
+
+    def __init__(
+        self,
+        client_patterns: Iterable[str] = DEFAULT_CLIENT_PATTERNS,
+        peer_id_prefixes: Iterable[str] = DEFAULT_PEER_ID_PREFIXES,
+        rules: Iterable[PeerRule] = (),
+    ):
+        """
+        :param client_patterns: Case-insensitive substrings of the peer's client name
+        :param peer_id_prefixes: Prefixes of the peer id client, e.g. -XL
+        :param rules: Callables receiving the peer dict, returning True to ban
+        """
+        client_patterns = list(client_patterns)
+        peer_id_prefixes = list(peer_id_prefixes)
+        self.client_re = (
+            re.compile("|".join(map(re.escape, client_patterns)), re.IGNORECASE)
+            if client_patterns
+            else None
+        )
+        self.peer_id_re = (
+            re.compile("(?:{})".format("|".join(map(re.escape, peer_id_prefixes))))
+            if peer_id_prefixes
+            else None
+        )
+        self.rules = list(rules)
+
+    def __call__(self, peer: dict) -> bool:
+        if self.client_re is not None and self.client_re.search(peer.get("client", "")):
+            return True
+        if self.peer_id_re is not None and self.peer_id_re.match(
+            peer.get("peer_id_client", "")
+        ):
+            return True
+        for rule in self.rules:
+            if rule(peer):
+                return True
+        return False
+
+
+class BanEngine:
+    """
+    Checks peers against a PeerMatcher, remembers what is already banned and
+    sends bans in batches through one transfer_banPeers call per batch
+    """
+
+    def __init__(
+        self,
+        client: "_BaseQbittorrentClient",
+        matcher: Optional[PeerMatcher] = None,
+        batch_size: int = 256,
+    ):
+        self.client = client
+        self.matcher = matcher or PeerMatcher()
+        self.batch_size = batch_size
+        self.banned: Set[str] = set()  # ip
+        self.pending: Dict[str, str] = {}  # ip -> host:port
+
+    def check(self, peers: Dict[str, dict]) -> List[str]:
+        """
+        Queue every offending peer which is not banned yet
+        :param peers: host:port -> peer dict, as found in sync_torrentPeers replies
+        :return: the newly queued host:port keys
+        """
+        queued = []
+        banned = self.banned
+        pending = self.pending
+        match = self.matcher
+        for key, peer in peers.items():
+            ip = peer.get("ip") or key.rsplit(":", 1)[0]
+            if ip in banned or ip in pending:
+                continue
+            if match(peer):
+                pending[ip] = key
+                queued.append(key)
+        return queued
+
+    async def flush(self) -> List[str]:
+        """
+        Ban every queued peer, batch_size peers per request
+        :return: the host:port keys which were banned
+        """
+        if not self.pending:
+            return []
+        items = list(self.pending.items())
+        self.pending.clear()
+        done = []
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start : start + self.batch_size]
+            keys = [key for _, key in batch]
+            try:
+                await self.client.transfer_banPeers("|".join(keys))
+            except BaseException:
+                # put the unsent peers back, they are retried on the next flush
+                self.pending.update(items[start:])
+                raise
+            self.banned.update(ip for ip, _ in batch)
+            done.extend(keys)
+        return done
+
+    async def scan(self, peer_mirror: PeerMirror) -> List[str]:
+        """
+        Poll peers, check only the peers which changed and flush the bans
+        :param peer_mirror: The peer mirror to update
+        :return: the host:port keys which were banned
+        """
+        deltas = await peer_mirror.update()
+        for hash, delta in deltas.items():
+            changed = delta.get("peers")
+            if changed:
+                table = peer_mirror.peers[hash]
+                self.check({key: table[key] for key in changed if key in table})
+        return await self.flush()
+
+    async def run(self, interval: float = 1.0, concurrency: int = 8):
+        """
+        Follow main data and ban offending peers of active torrents until cancelled
+        :param interval: Seconds between two scans
+        :param concurrency: Max number of concurrent sync_torrentPeers requests
+        :return:
+        """
+        maindata = MainDataMirror(self.client)
+        peer_mirror = PeerMirror(self.client, maindata, concurrency)
+        while True:
+            await maindata.update()
+            await self.scan(peer_mirror)
+            await asyncio.sleep(interval)
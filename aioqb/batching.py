@@ -0,0 +1,185 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from aioqb.chunking import CHUNKED_ENDPOINTS, ChunkedResult
+
+if TYPE_CHECKING:
+    from aioqb.client import _BaseQbittorrentClient
+
+DEFAULT_BATCH_WINDOW = 0.02
+DEFAULT_MAX_BATCH = 1000
+
+# toggles are not idempotent, two of them for one hash must not be merged
+BATCHED_ENDPOINTS = frozenset(
+    name for name in CHUNKED_ENDPOINTS if not name.startswith("torrents/toggle")
+)
+
+# batcher method name -> client method name, the client names almost every
+# method after its endpoint
+BATCHED_METHODS: Dict[str, str] = {
+    name.replace("/", "_", 1): name.replace("/", "_", 1) for name in BATCHED_ENDPOINTS
+}
+BATCHED_METHODS["torrents_setShareLimits"] = "setShareLimits"
+BATCHED_METHODS["setShareLimits"] = "setShareLimits"
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(value)
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    return value
+
+
+class _Batch:
+    __slots__ = ("method", "args", "kwargs", "waiters")
+
+    def __init__(self, method: str, args: tuple, kwargs: dict):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.waiters: Dict[str, List[asyncio.Future]] = {}  # hash -> callers
+
+
+class WriteBatcher:
+    """
+    Merges single torrent writes issued close together into multi-hash
+    requests. Writes are collected for window seconds and grouped by method
+    and the remaining arguments, every group goes out as one request:
+
+    batcher = WriteBatcher(client)
+    await asyncio.gather(*(batcher.torrents_setCategory(h, "x") for h in hashes))
+
+    Every caller awaits its own future. Windows are sent in order, a second
+    write of a hash in another group (another method, e.g. resume after
+    pause, or other arguments, e.g. another category) starts a new window
+    so it cannot overtake the first one.
+    """
+
+    def __init__(
+        self,
+        client: "_BaseQbittorrentClient",
+        window: float = DEFAULT_BATCH_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ):
+        """
+        :param client:
+        :param window: Seconds a write waits for others to join it
+        :param max_batch: Send the window early once a group has this many hashes
+        """
+        self.client = client
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = 0  # requests sent
+        self.writes = 0  # writes submitted
+        self._batches: Dict[tuple, _Batch] = {}
+        self._pending: Dict[str, tuple] = {}  # hash -> group
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_flush: Optional[asyncio.Future] = None
+
+    def submit(self, method: str, hash: str, *args, **kwargs) -> asyncio.Future:
+        """
+        Queue one write
+        :param method: client method name taking hashes first, e.g. torrents_addTags
+        :param hash: The hash of the torrent
+        :param args: The other arguments of the method
+        :param kwargs: The other arguments of the method
+        :return: future of the reply of the request the write was merged into
+        """
+        if method not in BATCHED_METHODS:
+            raise ValueError("{} can not be batched".format(method))
+        method = BATCHED_METHODS[method]
+        key = (
+            method,
+            tuple(map(_freeze, args)),
+            tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())),
+        )
+        pending = self._pending.get(hash)
+        if pending is not None and pending != key:  # e.g. pause then resume
+            self.flush()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(method, args, kwargs)
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.setdefault(hash, []).append(future)
+        self._pending[hash] = key
+        self.writes += 1
+        if len(batch.waiters) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return future
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def submit(hash: str, *args, **kwargs) -> asyncio.Future:
+            return self.submit(method, hash, *args, **kwargs)
+
+        return submit
+
+    def flush(self) -> Optional[asyncio.Future]:
+        """
+        Send the current window now
+        :return: the task sending it, None if nothing was queued
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._batches:
+            return None
+        batches = list(self._batches.values())
+        self._batches = {}
+        self._pending = {}
+        self._last_flush = asyncio.ensure_future(self._send(batches, self._last_flush))
+        return self._last_flush
+
+    async def _send(self, batches: List[_Batch], previous: Optional[asyncio.Future]):
+        if previous is not None:
+            await asyncio.wait([previous])
+        self.requests += len(batches)
+        await asyncio.gather(*map(self._send_batch, batches))
+
+    async def _send_batch(self, batch: _Batch):
+        waiters = batch.waiters
+        try:
+            reply = await getattr(self.client, batch.method)(
+                list(waiters), *batch.args, **batch.kwargs
+            )
+        except Exception as e:
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        failed = {}
+        if isinstance(reply, ChunkedResult):  # the client split it again
+            for hashes, error in reply.failures:
+                failed.update(dict.fromkeys(hashes, error))
+        for hash, futures in waiters.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if hash in failed:
+                    future.set_exception(failed[hash])
+                else:
+                    future.set_result(reply)
+
+    async def close(self):
+        """
+        Send whatever is queued and wait until every window is done
+        :return:
+        """
+        self.flush()
+        if self._last_flush is not None:
+            await asyncio.wait([self._last_flush])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,208 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import hashlib
+import io
+import mmap
+import os
+from typing import Any, Dict, Optional, Tuple, Union
+
+from aioqb.typing import TorrentSource
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+_DIGITS = frozenset(b"-0123456789")
+
+
+class _Decoder:
+    """
+    Recursive bencode decoder over a buffer. Only the decoded strings are
+    copied out, the buffer itself never is. Spans of the wanted values of
+    the top level dict are recorded so they can be hashed in place, and
+    large strings nobody needs (piece hashes) can be skipped.
+    """
+
+    __slots__ = ("data", "spans", "_wanted", "_skipped")
+
+    def __init__(
+        self,
+        data: Buffer,
+        wanted: Tuple[bytes, ...] = (),
+        skipped: Tuple[bytes, ...] = (),
+    ):
+        """
+        :param data:
+        :param wanted: keys of the top level dict whose value spans are recorded
+        :param skipped: keys whose string values are stepped over and decoded as None
+        """
+        self.data = data
+        self.spans: Dict[bytes, Tuple[int, int]] = {}
+        self._wanted = wanted
+        self._skipped = skipped
+
+    def _number(self, pos: int, end: int) -> Tuple[int, int]:
+        """
+        :return: the integer written from pos up to the end byte, and the position after it
+        """
+        data = self.data
+        stop = pos
+        while data[stop] != end:
+            if data[stop] not in _DIGITS:
+                raise ValueError("invalid bencode integer at offset {}".format(pos))
+            stop += 1
+        if stop == pos:
+            raise ValueError("empty bencode integer at offset {}".format(pos))
+        return int(bytes(data[pos:stop])), stop + 1
+
+    def decode(self, pos: int) -> Tuple[Any, int]:
+        """
+        :param pos: offset of a value
+        :return: the value and the offset after it
+        """
+        data = self.data
+        kind = data[pos]
+        if kind == 0x69:  # i
+            return self._number(pos + 1, 0x65)
+        if kind == 0x6C:  # l
+            pos += 1
+            items = []
+            while data[pos] != 0x65:
+                item, pos = self.decode(pos)
+                items.append(item)
+            return items, pos + 1
+        if kind == 0x64:  # d
+            top = pos == 0
+            pos += 1
+            items = {}
+            wanted = self._wanted
+            while data[pos] != 0x65:
+                key, pos = self.decode(pos)
+                if type(key) is not bytes:
+                    raise ValueError(
+                        "bencode dict key at offset {} is no string".format(pos)
+                    )
+                start = pos
+                if key in self._skipped and 0x30 <= data[pos] <= 0x39:
+                    length, pos = self._number(pos, 0x3A)
+                    items[key], pos = None, pos + length
+                else:
+                    items[key], pos = self.decode(pos)
+                if top and key in wanted:
+                    self.spans[key] = (start, pos)
+            return items, pos + 1
+        if 0x30 <= kind <= 0x39:
+            length, pos = self._number(pos, 0x3A)
+            end = pos + length
+            if end > len(data):
+                raise ValueError("bencode string at offset {} is truncated".format(pos))
+            return bytes(data[pos:end]), end
+        raise ValueError("invalid bencode value at offset {}".format(pos))
+
+
+def decode(data: Buffer) -> Any:
+    """
+    Decode one bencoded value, strings are returned as bytes
+    :param data: bytes, bytearray, memoryview or mmap
+    :return:
+    """
+    try:
+        value, end = _Decoder(data).decode(0)
+    except IndexError:
+        raise ValueError("bencode data is truncated") from None
+    except RecursionError:
+        raise ValueError("bencode data is nested too deeply") from None
+    return value
+
+
+class TorrentMetainfo:
+    """
+    What a .torrent file tells without asking the server: the v1 (SHA-1)
+    and v2 (SHA-256) info-hashes, name, total size and number of files
+    """
+
+    __slots__ = ("info_hash_v1", "info_hash_v2", "name", "total_size", "file_count")
+
+    def __init__(self, data: Buffer):
+        """
+        :param data: content of a .torrent file
+        """
+        decoder = _Decoder(data, (b"info",), (b"pieces", b"piece layers"))
+        try:
+            meta, _ = decoder.decode(0)
+        except IndexError:
+            raise ValueError("bencode data is truncated") from None
+        except RecursionError:
+            raise ValueError("bencode data is nested too deeply") from None
+        if type(meta) is not dict or type(meta.get(b"info")) is not dict:
+            raise ValueError("not a torrent file: no info dict")
+        info: dict = meta[b"info"]
+        v1 = b"pieces" in info
+        v2 = info.get(b"meta version") == 2
+        if not v1 and not v2:
+            raise ValueError("not a torrent file: neither v1 pieces nor v2 file tree")
+        start, end = decoder.spans[b"info"]
+        with memoryview(data) as view, view[start:end] as span:
+            self.info_hash_v1: Optional[str] = (
+                hashlib.sha1(span).hexdigest() if v1 else None
+            )
+            self.info_hash_v2: Optional[str] = (
+                hashlib.sha256(span).hexdigest() if v2 else None
+            )
+        self.name: str = info.get(b"name", b"").decode("utf-8", "replace")
+        if v1:  # v1 and hybrid
+            files = info.get(b"files")
+            if files is None:
+                sizes = [info.get(b"length", 0)]
+            else:
+                sizes = [f[b"length"] for f in files if not self._is_pad(f)]
+        else:
+            sizes = list(self._tree_sizes(info.get(b"file tree", {})))
+        self.total_size: int = sum(sizes)
+        self.file_count: int = len(sizes)
+
+    @staticmethod
+    def _is_pad(file: dict) -> bool:
+        return b"p" in file.get(b"attr", b"")
+
+    @classmethod
+    def _tree_sizes(cls, tree: dict):
+        for name, node in tree.items():
+            if name == b"":
+                yield node.get(b"length", 0)
+            else:
+                yield from cls._tree_sizes(node)
+
+    @property
+    def hash(self) -> str:
+        """
+        The hash the WebUI knows the torrent by: the v1 hash, or the v2 hash
+        truncated to 40 characters for v2 only torrents
+        :return:
+        """
+        if self.info_hash_v1 is not None:
+            return self.info_hash_v1
+        return self.info_hash_v2[:40]
+
+    def __repr__(self):
+        return "TorrentMetainfo({!r}, hash={}, total_size={}, file_count={})".format(
+            self.name, self.hash, self.total_size, self.file_count
+        )
+
+
+def read_metainfo(source: TorrentSource) -> TorrentMetainfo:
+    """
+    Parse the metainfo of anything torrents_add accepts. A file object is
+    read from its current position and rewound afterwards.
+    :param source: file object, bytes, bytearray, memoryview, mmap or path
+    :return:
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return TorrentMetainfo(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return TorrentMetainfo(f.read())
+    pos = source.tell()
+    try:
+        return TorrentMetainfo(source.read())
+    finally:
+        source.seek(pos, io.SEEK_SET)
@@ -0,0 +1,115 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set
+
+# endpoint name -> seconds a reply stays valid
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "app/version": 3600.0,
+    "app/webapiVersion": 3600.0,
+    "app/buildInfo": 3600.0,
+    "app/preferences": 60.0,
+    "app/defaultSavePath": 60.0,
+    "torrents/categories": 30.0,
+    "torrents/tags": 30.0,
+    "rss/rules": 60.0,
+    "search/plugins": 300.0,
+}
+
+MISSING = object()
+
+
+class ResponseCache:
+    """
+    Size bounded LRU cache of replies with a TTL per endpoint. Only endpoints
+    listed in ttls are cached, writes invalidate the endpoints they affect.
+    """
+
+    def __init__(self, maxsize: int = 256, ttls: Optional[Dict[str, float]] = None):
+        """
+        :param maxsize: Max number of cached replies, the least recently used is evicted first
+        :param ttls: endpoint name (e.g. torrents/categories) -> seconds, defaults to DEFAULT_CACHE_TTLS
+        """
+        self.maxsize = maxsize
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._keys: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """
+        :param key:
+        :return: the cached reply or MISSING
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, name, value = entry
+            if expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._remove(key, name)
+        self.misses += 1
+        return MISSING
+
+    def generation(self, name: str) -> int:
+        """
+        Take this before sending a request and pass it to put, so a reply
+        which raced with an invalidating write is not stored
+        :param name:
+        :return:
+        """
+        return self._generations.get(name, 0)
+
+    def put(self, name: str, key: Hashable, value, generation: Optional[int] = None):
+        ttl = self.ttls.get(name)
+        if ttl is None or (
+            generation is not None and generation != self.generation(name)
+        ):
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (time.monotonic() + ttl, name, value)
+        self._keys.setdefault(name, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            old_key, (_, old_name, _) = self._entries.popitem(last=False)
+            self._keys[old_name].discard(old_key)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable, name: str):
+        del self._entries[key]
+        self._keys[name].discard(key)
+
+    def invalidate(self, *names: str):
+        """
+        Drop every cached reply of the given endpoints
+        :param names: endpoint names, e.g. torrents/categories
+        :return:
+        """
+        for name in names:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            for key in self._keys.pop(name, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        self.invalidate(*list(self._keys))
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,80 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from typing import Any, List, Tuple, Union
+
+DEFAULT_CHUNK_CONCURRENCY = 4
+
+# writes whose hashes field can be split into several requests. The queue
+# priority endpoints are left out on purpose, splitting them would reorder
+# the torrents relative to each other.
+CHUNKED_ENDPOINTS = frozenset(
+    (
+        "torrents/pause",
+        "torrents/resume",
+        "torrents/delete",
+        "torrents/recheck",
+        "torrents/reannounce",
+        "torrents/addPeers",
+        "torrents/setDownloadLimit",
+        "torrents/setShareLimits",
+        "torrents/setUploadLimit",
+        "torrents/setLocation",
+        "torrents/setCategory",
+        "torrents/addTags",
+        "torrents/removeTags",
+        "torrents/setAutoManagement",
+        "torrents/toggleSequentialDownload",
+        "torrents/toggleFirstLastPiecePrio",
+        "torrents/setForceStart",
+        "torrents/setSuperSeeding",
+    )
+)
+
+
+def split_hashes(
+    hashes: Union[str, List[str], None], size: int
+) -> List[Union[str, List[str]]]:
+    """
+    :param hashes: a | separated string or a list, all is never split
+    :param size: Max number of hashes per chunk
+    :return: the chunks, a single element list when nothing needs splitting
+    """
+    if hashes is None or hashes == "all":
+        return [hashes]
+    if isinstance(hashes, str):
+        hashes = hashes.split("|")
+    elif not isinstance(hashes, (list, tuple)):
+        hashes = list(hashes)
+    if len(hashes) <= size:
+        return [hashes]
+    return [hashes[i : i + size] for i in range(0, len(hashes), size)]
+
+
+class ChunkedResult:
+    """
+    Outcome of a write which was split into several requests. Failed
+    chunks do not stop the others, their hashes (the torrent files for
+    torrents_add) and errors are kept in failures so the caller can retry
+    just those.
+    """
+
+    def __init__(self):
+        self.results: List[Tuple[List[str], Any]] = []
+        self.failures: List[Tuple[List[str], BaseException]] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    @property
+    def failed_hashes(self) -> List[str]:
+        return [h for hashes, _ in self.failures for h in hashes]
+
+    def __len__(self):
+        return len(self.results) + len(self.failures)
+
+    def __repr__(self):
+        return "ChunkedResult(chunks={}, failed={})".format(
+            len(self), len(self.failures)
+        )
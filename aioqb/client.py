@@ -1,26 +1,87 @@
 """
 Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
 """
+import asyncio
+import time
+from contextlib import ExitStack, asynccontextmanager
 from functools import partial
-from typing import BinaryIO, List, Optional, Union
+from itertools import zip_longest
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urljoin
 
 import aiohttp
 from typing_extensions import Literal
 
+from aioqb.bencode import read_metainfo
+from aioqb.cache import MISSING, ResponseCache
+from aioqb.chunking import (
+    CHUNKED_ENDPOINTS,
+    DEFAULT_CHUNK_CONCURRENCY,
+    ChunkedResult,
+    split_hashes,
+)
+from aioqb.encoding import get_encoder
+from aioqb.endpoints import (
+    INVALIDATES,
+    JSON_ENDPOINTS,
+    READ_ENDPOINTS,
+    endpoint_name,
+)
 from aioqb.exceptions import (
     ApiFailedException,
     BaseQbittorrentException,
     HashNotFoundException,
     IPBanedException,
 )
-from aioqb.typing import JsonDumps, JsonLoads
+from aioqb.limiter import ConcurrencyLimiter
+from aioqb.magnet import dedupe_urls, magnet_hash
+from aioqb.resilience import TRANSIENT_ERRORS, CircuitBreaker, RetryPolicy
+from aioqb.stream import JsonArrayParser
+from aioqb.sync import MainDataMirror
+from aioqb.tail import LogTailer
+from aioqb.typing import JsonDumps, JsonLoads, TorrentSource
+from aioqb.upload import TorrentUpload, build_form, prepare_uploads, split_uploads
 from aioqb.utils import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_CONNECTION_LIMIT_PER_HOST,
+    DEFAULT_DNS_CACHE_TTL,
     DEFAULT_HOST,
     DEFAULT_JSON_DECODER,
     DEFAULT_JSON_ENCODER,
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MAX_UPLOAD_SIZE,
+    DEFAULT_MAX_URLS,
+    DEFAULT_MIN_INTERVAL,
     DEFAULT_TIMEOUT,
+    DEFAULT_UPLOAD_CONCURRENCY,
+    AdaptiveInterval,
 )
+from aioqb.waiters import TorrentWaiter, WaitUntil
+
+
+def _torrents_info_data(
+    filter, category, tag, sort, reverse, limit, offset, hashes
+) -> dict:
+    data = {}
+    if filter is not None:
+        data["filter"] = filter
+    if category is not None:
+        data["category"] = category
+    if tag is not None:
+        data["tag"] = tag
+    if sort is not None:
+        data["sort"] = sort
+    if reverse is not None:
+        data["reverse"] = reverse
+    if limit is not None:
+        data["limit"] = limit
+    if offset is not None:
+        data["offset"] = offset
+    if hashes is not None:
+        data["hashes"] = hashes
+    return data
 
 
 class _BaseQbittorrentClient:
@@ -39,6 +100,7 @@ class _BaseQbittorrentClient:
         self.loads = loads
         self.dumps = dumps
         self.prefix = prefix
+        self._torrent_waiter: Optional[TorrentWaiter] = None
 
     # Login
     async def auth_login(self):
@@ -406,155 +468,8 @@ class _BaseQbittorrentClient:
         :param utp_tcp_mixed_mode:
         :return:
         """
-        data = {
-            "locale": locale,
-            "create_subfolder_enabled": create_subfolder_enabled,
-            "start_paused_enabled": start_paused_enabled,
-            "auto_delete_mode": auto_delete_mode,
-            "preallocate_all": preallocate_all,
-            "incomplete_files_ext": incomplete_files_ext,
-            "auto_tmm_enabled": auto_tmm_enabled,
-            "torrent_changed_tmm_enabled": torrent_changed_tmm_enabled,
-            "save_path_changed_tmm_enabled": save_path_changed_tmm_enabled,
-            "category_changed_tmm_enabled": category_changed_tmm_enabled,
-            "save_path": save_path,
-            "temp_path_enabled": temp_path_enabled,
-            "temp_path": temp_path,
-            "scan_dirs": scan_dirs,
-            "export_dir": export_dir,
-            "export_dir_fin": export_dir_fin,
-            "mail_notification_enabled": mail_notification_enabled,
-            "mail_notification_sender": mail_notification_sender,
-            "mail_notification_email": mail_notification_email,
-            "mail_notification_smtp": mail_notification_smtp,
-            "mail_notification_ssl_enabled": mail_notification_ssl_enabled,
-            "mail_notification_auth_enabled": mail_notification_auth_enabled,
-            "mail_notification_username": mail_notification_username,
-            "mail_notification_password": mail_notification_password,
-            "autorun_enabled": autorun_enabled,
-            "autorun_program": autorun_program,
-            "queueing_enabled": queueing_enabled,
-            "max_active_downloads": max_active_downloads,
-            "max_active_torrents": max_active_torrents,
-            "max_active_uploads": max_active_uploads,
-            "dont_count_slow_torrents": dont_count_slow_torrents,
-            "slow_torrent_dl_rate_threshold": slow_torrent_dl_rate_threshold,
-            "slow_torrent_ul_rate_threshold": slow_torrent_ul_rate_threshold,
-            "slow_torrent_inactive_timer": slow_torrent_inactive_timer,
-            "max_ratio_enabled": max_ratio_enabled,
-            "max_ratio": max_ratio,
-            "max_ratio_act": max_ratio_act,
-            "listen_port": listen_port,
-            "upnp": upnp,
-            "random_port": random_port,
-            "dl_limit": dl_limit,
-            "up_limit": up_limit,
-            "max_connec": max_connec,
-            "max_connec_per_torrent": max_connec_per_torrent,
-            "max_uploads": max_uploads,
-            "max_uploads_per_torrent": max_uploads_per_torrent,
-            "stop_tracker_timeout": stop_tracker_timeout,
-            "enable_piece_extent_affinity": enable_piece_extent_affinity,
-            "bittorrent_protocol": bittorrent_protocol,
-            "limit_utp_rate": limit_utp_rate,
-            "limit_tcp_overhead": limit_tcp_overhead,
-            "limit_lan_peers": limit_lan_peers,
-            "alt_dl_limit": alt_dl_limit,
-            "alt_up_limit": alt_up_limit,
-            "scheduler_enabled": scheduler_enabled,
-            "schedule_from_hour": schedule_from_hour,
-            "schedule_from_min": schedule_from_min,
-            "schedule_to_hour": schedule_to_hour,
-            "schedule_to_min": schedule_to_min,
-            "scheduler_days": scheduler_days,
-            "dht": dht,
-            "pex": pex,
-            "lsd": lsd,
-            "encryption": encryption,
-            "anonymous_mode": anonymous_mode,
-            "proxy_type": proxy_type,
-            "proxy_ip": proxy_ip,
-            "proxy_port": proxy_port,
-            "proxy_peer_connections": proxy_peer_connections,
-            "proxy_auth_enabled": proxy_auth_enabled,
-            "proxy_username": proxy_username,
-            "proxy_password": proxy_password,
-            "proxy_torrents_only": proxy_torrents_only,
-            "ip_filter_enabled": ip_filter_enabled,
-            "ip_filter_path": ip_filter_path,
-            "ip_filter_trackers": ip_filter_trackers,
-            "web_ui_domain_list": web_ui_domain_list,
-            "web_ui_address": web_ui_address,
-            "web_ui_port": web_ui_port,
-            "web_ui_upnp": web_ui_upnp,
-            "web_ui_username": web_ui_username,
-            "web_ui_password": web_ui_password,
-            "web_ui_csrf_protection_enabled": web_ui_csrf_protection_enabled,
-            "web_ui_clickjacking_protection_enabled": web_ui_clickjacking_protection_enabled,
-            "web_ui_secure_cookie_enabled": web_ui_secure_cookie_enabled,
-            "web_ui_max_auth_fail_count": web_ui_max_auth_fail_count,
-            "web_ui_ban_duration": web_ui_ban_duration,
-            "web_ui_session_timeout": web_ui_session_timeout,
-            "web_ui_host_header_validation_enabled": web_ui_host_header_validation_enabled,
-            "bypass_local_auth": bypass_local_auth,
-            "bypass_auth_subnet_whitelist_enabled": bypass_auth_subnet_whitelist_enabled,
-            "bypass_auth_subnet_whitelist": bypass_auth_subnet_whitelist,
-            "alternative_webui_enabled": alternative_webui_enabled,
-            "alternative_webui_path": alternative_webui_path,
-            "use_https": use_https,
-            "ssl_key": ssl_key,
-            "ssl_cert": ssl_cert,
-            "web_ui_https_key_path": web_ui_https_key_path,
-            "web_ui_https_cert_path": web_ui_https_cert_path,
-            "dyndns_enabled": dyndns_enabled,
-            "dyndns_service": dyndns_service,
-            "dyndns_username": dyndns_username,
-            "dyndns_password": dyndns_password,
-            "dyndns_domain": dyndns_domain,
-            "rss_refresh_interval": rss_refresh_interval,
-            "rss_max_articles_per_feed": rss_max_articles_per_feed,
-            "rss_processing_enabled": rss_processing_enabled,
-            "rss_auto_downloading_enabled": rss_auto_downloading_enabled,
-            "rss_download_repack_proper_episodes": rss_download_repack_proper_episodes,
-            "rss_smart_episode_filters": rss_smart_episode_filters,
-            "add_trackers_enabled": add_trackers_enabled,
-            "add_trackers": add_trackers,
-            "web_ui_use_custom_http_headers_enabled": web_ui_use_custom_http_headers_enabled,
-            "web_ui_custom_http_headers": web_ui_custom_http_headers,
-            "max_seeding_time_enabled": max_seeding_time_enabled,
-            "max_seeding_time": max_seeding_time,
-            "announce_ip": announce_ip,
-            "announce_to_all_tiers": announce_to_all_tiers,
-            "announce_to_all_trackers": announce_to_all_trackers,
-            "async_io_threads": async_io_threads,
-            "banned_IPs": banned_IPs,
-            "checking_memory_use": checking_memory_use,
-            "current_interface_address": current_interface_address,
-            "current_network_interface": current_network_interface,
-            "disk_cache": disk_cache,
-            "disk_cache_ttl": disk_cache_ttl,
-            "embedded_tracker_port": embedded_tracker_port,
-            "enable_coalesce_read_write": enable_coalesce_read_write,
-            "enable_embedded_tracker": enable_embedded_tracker,
-            "enable_multi_connections_from_same_ip": enable_multi_connections_from_same_ip,
-            "enable_os_cache": enable_os_cache,
-            "enable_upload_suggestions": enable_upload_suggestions,
-            "file_pool_size": file_pool_size,
-            "outgoing_ports_max": outgoing_ports_max,
-            "outgoing_ports_min": outgoing_ports_min,
-            "recheck_completed_torrents": recheck_completed_torrents,
-            "resolve_peer_countries": resolve_peer_countries,
-            "save_resume_data_interval": save_resume_data_interval,
-            "send_buffer_low_watermark": send_buffer_low_watermark,
-            "send_buffer_watermark": send_buffer_watermark,
-            "send_buffer_watermark_factor": send_buffer_watermark_factor,
-            "socket_backlog_size": socket_backlog_size,
-            "upload_choking_algorithm": upload_choking_algorithm,
-            "upload_slots_behavior": upload_slots_behavior,
-            "upnp_lease_duration": upnp_lease_duration,
-            "utp_tcp_mixed_mode": utp_tcp_mixed_mode,
-        }
-        data = {k: v for k, v in data.items() if v is not None}
+        arguments = locals()  # first statement, only the parameters are bound yet
+        data = {k: v for k, v in arguments.items() if v is not None and k != "self"}
         return await self.send_request(f"{self.prefix}/app/setPreferences", data)
 
     # Get default save path
@@ -604,6 +519,58 @@ class _BaseQbittorrentClient:
         data = {"last_known_id": last_known_id}
         return await self.send_request(f"{self.prefix}/log/peers", data)
 
+    def tail_log_main(
+        self,
+        normal: Optional[bool] = True,
+        info: Optional[bool] = True,
+        warning: Optional[bool] = True,
+        critical: Optional[bool] = True,
+        last_known_id: Optional[int] = -1,
+        buffer_size: Optional[int] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ) -> LogTailer:
+        """
+        Follow the main log
+        async for entry in client.tail_log_main(): ...
+        :param normal:          Include normal messages (default: true)
+        :param info:            Include info messages (default: true)
+        :param warning:         Include warning messages (default: true)
+        :param critical:        Include critical messages (default: true)
+        :param last_known_id:   Resume after this message id (default: -1)
+        :param buffer_size:     Keep the last buffer_size entries in the tailer's ring buffer
+        :param min_interval:    Poll interval in seconds while new entries arrive
+        :param max_interval:    Upper bound of the poll interval while idle
+        :return:
+        """
+        return LogTailer(
+            partial(self.log_main, normal, info, warning, critical),
+            last_known_id,
+            buffer_size,
+            min_interval,
+            max_interval,
+        )
+
+    def tail_log_peers(
+        self,
+        last_known_id: Optional[int] = -1,
+        buffer_size: Optional[int] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ) -> LogTailer:
+        """
+        Follow the peer log
+        async for entry in client.tail_log_peers(): ...
+        :param last_known_id:   Resume after this message id (default: -1)
+        :param buffer_size:     Keep the last buffer_size entries in the tailer's ring buffer
+        :param min_interval:    Poll interval in seconds while new entries arrive
+        :param max_interval:    Upper bound of the poll interval while idle
+        :return:
+        """
+        return LogTailer(
+            self.log_peers, last_known_id, buffer_size, min_interval, max_interval
+        )
+
     # Sync
     async def sync_maindata(self, rid: Optional[int] = 0):
         """
@@ -625,6 +592,85 @@ class _BaseQbittorrentClient:
         data = {"hash": hash, "rid": rid}
         return await self.send_request(f"{self.prefix}/sync/torrentPeers", data)
 
+    async def watch_maindata(
+        self,
+        rid: Optional[int] = 0,
+        mirror: Optional[MainDataMirror] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        factor: float = 2.0,
+        jitter: float = 0.1,
+        yield_idle: bool = False,
+    ) -> AsyncIterator[dict]:
+        """
+        Follow main data changes with adaptive polling
+        async for update in client.watch_maindata(): ...
+        :param rid: Response ID to start from. Ignored when mirror is given, the mirror's rid is used instead
+        :param mirror: Optional MainDataMirror every delta is applied to before it is yielded
+        :param min_interval: Poll interval in seconds while deltas are non-empty
+        :param max_interval: Upper bound of the poll interval while idle
+        :param factor: Growth factor of the interval for every idle poll
+        :param jitter: Random fraction added to or subtracted from every interval
+        :param yield_idle: Also yield replies which carry nothing but the rid
+        :return:
+        """
+        interval = AdaptiveInterval(min_interval, max_interval, factor, jitter)
+        while True:
+            if mirror is not None:
+                data = await mirror.update()
+            else:
+                data = await self.sync_maindata(rid)
+                rid = data.get("rid", rid)
+            active = any(k not in ("rid", "full_update") for k in data)
+            if active or yield_idle:
+                yield data
+            await asyncio.sleep(interval.feed(active))
+
+    async def wait_for_torrents(
+        self,
+        hashes: Union[str, List[str]],
+        until: WaitUntil = "present",
+        timeout: Optional[float] = None,
+        waiter: Optional[TorrentWaiter] = None,
+    ) -> Dict[str, dict]:
+        """
+        Wait until torrents show up, e.g. after torrents_add
+        await client.wait_for_torrents(hashes, until="metadata", timeout=60)
+        All waits of the client share one waiter. By default it polls sync_maindata with a mirror of its own
+        while someone waits, see share_mirror to reuse a mirror which is already kept up to date
+        :param hashes: The hashes of the torrents, a list or separated by |
+        :param until: present (listed by the server), metadata (magnet links resolved) or completed (fully downloaded)
+        :param timeout: Seconds to wait, None waits forever
+        :param waiter: TorrentWaiter to use instead of the shared one
+        :raise asyncio.TimeoutError: when a torrent did not get there in time
+        :raise HashNotFoundException: when a torrent was removed while waited for
+        :return: hash -> torrent dict at the moment it got there
+        """
+        if waiter is None:
+            if self._torrent_waiter is None:
+                self._torrent_waiter = TorrentWaiter(self)
+            waiter = self._torrent_waiter
+        return await waiter.wait(hashes, until, timeout)
+
+    async def share_mirror(
+        self, mirror: MainDataMirror, poll: bool = False
+    ) -> TorrentWaiter:
+        """
+        Make wait_for_torrents read from mirror instead of polling with a mirror of its own
+        async for _ in client.watch_maindata(mirror=mirror): ...
+        :param mirror: A mirror of this client, e.g. the one given to watch_maindata or an EventBus
+        :param poll: Poll sync_maindata while waits are pending, leave False when the mirror is updated elsewhere
+        :raise RuntimeError: when waits on the current shared waiter are still pending
+        :return: the new shared waiter
+        """
+        old = self._torrent_waiter
+        if old is not None:
+            if old.pending:
+                raise RuntimeError("wait_for_torrents calls are still pending")
+            await old.close()
+        self._torrent_waiter = TorrentWaiter(self, mirror, poll=poll)
+        return self._torrent_waiter
+
     # Transfer info
     async def transfer_info(self):
         """
@@ -720,21 +766,69 @@ class _BaseQbittorrentClient:
         :param hashes: Filter by hashes. Can contain multiple hashes separated by |
         :return:
         """
-        data = {
-            "filter": filter,
-            "category": category,
-            "tag": tag,
-            "sort": sort,
-            "reverse": reverse,
-            "limit": limit,
-            "offset": offset,
-        }
-        if hashes is not None:
-            hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
-            data["hashes"] = hashes
-        data = {k: v for k, v in data.items() if v is not None}
+        data = _torrents_info_data(
+            filter, category, tag, sort, reverse, limit, offset, hashes
+        )
         return await self.send_request(f"{self.prefix}/torrents/info", data)
 
+    def iter_torrents_info(
+        self,
+        filter: Optional[str] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        sort: Optional[str] = None,
+        reverse: Optional[bool] = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        hashes: Optional[Union[str, List[str]]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[dict]:
+        """
+        Get torrent list as a stream
+        async for torrent in client.iter_torrents_info(): ...
+        The reply is parsed element by element, memory stays bounded by chunk_size and the largest torrent
+        :param filter: see torrents_info
+        :param category: see torrents_info
+        :param tag: see torrents_info
+        :param sort: see torrents_info
+        :param reverse: see torrents_info
+        :param limit: see torrents_info
+        :param offset: see torrents_info
+        :param hashes: see torrents_info
+        :param chunk_size: Bytes read from the connection at a time
+        :return:
+        """
+        data = _torrents_info_data(
+            filter, category, tag, sort, reverse, limit, offset, hashes
+        )
+        return self.stream_request(
+            f"{self.prefix}/torrents/info", data, chunk_size=chunk_size
+        )
+
+    async def select_hashes(
+        self,
+        filter: Optional[str] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        predicate: Optional[Callable[[dict], bool]] = None,
+    ) -> List[str]:
+        """
+        Hashes of the torrents matching the filters. Pass the list to a write instead of all
+        to touch only that subset, long lists are chunked by the client
+        :param filter: see torrents_info
+        :param category: see torrents_info
+        :param tag: see torrents_info
+        :param predicate: Extra client side test, torrent dict -> keep
+        :return:
+        """
+        hashes = []
+        async for torrent in self.iter_torrents_info(
+            filter=filter, category=category, tag=tag
+        ):
+            if predicate is None or predicate(torrent):
+                hashes.append(torrent["hash"])
+        return hashes
+
     async def torrents_properties(self, hash: str):
         """
         Get torrent generic properties
@@ -772,9 +866,28 @@ class _BaseQbittorrentClient:
         :param indexes: The indexes of the files you want to retrieve. indexes can contain multiple values separated by |.
         :return:
         """
-        data = {"hash": hash, "index": indexes} if indexes else {"hash": hash}
+        data = {"hash": hash, "indexes": indexes}
         return await self.send_request(f"{self.prefix}/torrents/files", data)
 
+    def iter_torrents_files(
+        self,
+        hash: str,
+        indexes: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[dict]:
+        """
+        Get torrent contents as a stream
+        async for file in client.iter_torrents_files(hash): ...
+        :param hash: The hash of the torrent you want to get the contents of
+        :param indexes: The indexes of the files you want to retrieve. indexes can contain multiple values separated by |.
+        :param chunk_size: Bytes read from the connection at a time
+        :return:
+        """
+        data = {"hash": hash, "indexes": indexes}
+        return self.stream_request(
+            f"{self.prefix}/torrents/files", data, chunk_size=chunk_size
+        )
+
     async def torrents_pieceStates(self, hash: str):
         """
         Get torrent pieces' states
@@ -853,7 +966,7 @@ class _BaseQbittorrentClient:
     async def torrents_add(
         self,
         urls: Optional[List[str]] = None,
-        torrents: Optional[List[BinaryIO]] = None,
+        torrents: Optional[List[TorrentSource]] = None,
         savepath: Optional[str] = None,
         cookie: Optional[str] = None,
         category: Optional[str] = None,
@@ -869,11 +982,16 @@ class _BaseQbittorrentClient:
         autoTMM: Optional[bool] = None,
         sequentialDownload: Optional[Union[Literal["true", "false"], bool]] = None,
         firstLastPiecePrio: Optional[Union[Literal["true", "false"], bool]] = None,
+        max_request_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        skip_existing: Union[bool, MainDataMirror] = False,
+        max_urls: int = DEFAULT_MAX_URLS,
     ):
         """
         Add new torrent
-        :param urls: URLs separated with newlines
-        :param torrents: Raw data of torrent file. torrents can be presented multiple times.
+        :param urls: URLs separated with newlines. Repeated URLs and magnet links of the same torrent are sent once
+        :param torrents: torrent files as file objects, bytes, memoryview, mmap or paths. Paths are opened only while
+        their request is sent and files are streamed, so large batches are never held in memory at once
         :param savepath: Download folder
         :param cookie: Cookie sent to download the .torrent file
         :param category: Category for the torrent
@@ -889,67 +1007,119 @@ class _BaseQbittorrentClient:
         :param autoTMM: Whether Automatic Torrent Management should be used
         :param sequentialDownload: Enable sequential download. Possible values are true, false (default)
         :param firstLastPiecePrio: Prioritize download first last piece. Possible values are true, false (default)
-        :return:
-        """
-
-        data = aiohttp.FormData()
-        if urls is not None:
-            data.add_field("urls", "\n".join(urls))
-        if torrents is not None:
-            for t in torrents:
-                data.add_field(
-                    "torrents",
-                    t,
-                    content_type="application/x-bittorrent",
-                    filename=t.name,
-                )
-        if savepath is not None:
-            data.add_field("savepath", savepath)
-        if cookie is not None:
-            data.add_field("cookie", cookie)
-        if category is not None:
-            data.add_field("category", category)
-        if tags is not None:
-            tags = tags if isinstance(tags, str) else ",".join(tags)
-            data.add_field("tags", tags)
-        if skip_checking is not None:
-            skip_checking = "true" if skip_checking in ("true", True) else "false"
-            data.add_field("skip_checking", skip_checking)
-        if paused is not None:
-            paused = "true" if paused in ("true", True) else "false"
-            data.add_field("paused", paused)
-        if root_folder is not None:
-            if root_folder in ("true", True):
-                root_folder = "true"
-            elif root_folder in ("false", False):
-                root_folder = "false"
-            else:
-                root_folder = "unset"
-            data.add_field("root_folder", root_folder)
-        if rename is not None:
-            data.add_field("rename", rename)
-        if upLimit is not None:
-            data.add_field("upLimit", upLimit)
-        if dlLimit is not None:
-            data.add_field("dlLimit", dlLimit)
-        if ratioLimit is not None:
-            data.add_field("ratioLimit", ratioLimit)
-        if seedingTimeLimit is not None:
-            data.add_field("seedingTimeLimit", seedingTimeLimit)
-        if autoTMM is not None:
-            data.add_field("autoTMM", autoTMM)
-        if sequentialDownload is not None:
-            sequentialDownload = (
-                "true" if sequentialDownload in ("true", True) else "false"
+        :param max_request_size: Split torrents into several requests carrying at most this many bytes of files
+        :param upload_concurrency: Max number of those requests in flight
+        :param skip_existing: Leave out torrent files and magnet links the server already has, by their info-hash.
+        True asks the server with one torrents_info call, a MainDataMirror answers from the mirror without a request
+        :param max_urls: Split urls into several requests of at most this many URLs
+        :return: the reply, or a ChunkedResult of the added urls and files when they were split.
+        "Ok." without a request when skip_existing left nothing to add
+        """
+
+        endpoint = f"{self.prefix}/torrents/add"
+        encoder = get_encoder(endpoint)
+        params = {
+            "savepath": savepath,
+            "cookie": cookie,
+            "category": category,
+            "tags": tags,
+            "skip_checking": skip_checking,
+            "paused": paused,
+            "root_folder": root_folder,
+            "rename": rename,
+            "upLimit": upLimit,
+            "dlLimit": dlLimit,
+            "ratioLimit": ratioLimit,
+            "seedingTimeLimit": seedingTimeLimit,
+            "autoTMM": autoTMM,
+            "sequentialDownload": sequentialDownload,
+            "firstLastPiecePrio": firstLastPiecePrio,
+        }
+        if isinstance(urls, str):
+            urls = urls.split("\n")
+        urls = dedupe_urls(urls) if urls else []
+        torrents = list(torrents) if torrents else []
+        if skip_existing is not False and (torrents or urls):
+            torrents, urls = await self.drop_existing(
+                torrents, urls, None if skip_existing is True else skip_existing
             )
-            data.add_field("sequentialDownload", sequentialDownload)
-        if firstLastPiecePrio is not None:
-            firstLastPiecePrio = (
-                "true" if firstLastPiecePrio in ("true", True) else "false"
+            if not torrents and not urls:
+                return "Ok."
+        requests = list(
+            zip_longest(
+                [urls[i : i + max_urls] for i in range(0, len(urls), max_urls)],
+                split_uploads(prepare_uploads(torrents), max_request_size),
+                fillvalue=[],
             )
-            data.add_field("firstLastPiecePrio", firstLastPiecePrio)
+        )
+        if len(requests) <= 1:
+            url_batch, batch = requests[0] if requests else ([], [])
+            with ExitStack() as stack:
+                fields = encoder(dict(params, urls=url_batch or None))
+                return await self.send_request(
+                    endpoint, build_form(fields, batch, stack)
+                )
+
+        result = ChunkedResult()
+        semaphore = asyncio.Semaphore(upload_concurrency)
+
+        async def send(url_batch: List[str], batch: List[TorrentUpload]):
+            items = url_batch + [u.source for u in batch]
+            async with semaphore:
+                try:
+                    with ExitStack() as stack:
+                        fields = encoder(dict(params, urls=url_batch or None))
+                        reply = await self.send_request(
+                            endpoint, build_form(fields, batch, stack)
+                        )
+                except (BaseQbittorrentException, *TRANSIENT_ERRORS) as e:
+                    result.failures.append((items, e))
+                else:
+                    result.results.append((items, reply))
+
+        await asyncio.gather(*(send(u, b) for u, b in requests))
+        return result
 
-        return await self.send_request(f"{self.prefix}/torrents/add", data)
+    async def drop_existing(
+        self,
+        torrents: List[TorrentSource],
+        urls: List[str],
+        mirror: Optional[MainDataMirror] = None,
+    ) -> Tuple[List[TorrentSource], List[str]]:
+        """
+        Drop the torrent files and magnet links the server already has, and duplicates within them.
+        All hashes are checked with a single torrents_info call. Files which can not be parsed and
+        URLs other than magnet links are kept and left to the server
+        :param torrents: see torrents_add
+        :param urls: see torrents_add
+        :param mirror: Check against this mirror instead of asking the server
+        :return: the remaining torrents and urls
+        """
+        files = {}
+        for source in torrents:
+            try:
+                hash = read_metainfo(source).hash
+            except (ValueError, OSError):
+                hash = None
+            files.setdefault(hash or id(source), source)
+        magnets = {}
+        for url in urls:
+            hash = magnet_hash(url)
+            if (
+                hash not in files
+            ):  # a file of the same torrent saves the metadata lookup
+                magnets.setdefault(hash or (url,), url)
+        wanted = [h for h in (*files, *magnets) if isinstance(h, str)]
+        if mirror is not None:
+            known = {h for h in wanted if h in mirror}
+        elif wanted:
+            known = {t["hash"] for t in await self.torrents_info(hashes=wanted)}
+        else:
+            known = set()
+        return (
+            [source for hash, source in files.items() if hash not in known],
+            [url for hash, url in magnets.items() if hash not in known],
+        )
 
     async def torrents_addTrackers(self, hash: str, urls: List[str]):
         """
@@ -959,7 +1129,7 @@ class _BaseQbittorrentClient:
         :param urls:
         :return:
         """
-        data = {"hash": hash, "urls": "%0A".join(urls)}
+        data = {"hash": hash, "urls": urls}
         return await self.send_request(f"{self.prefix}/torrents/addTrackers", data)
 
     async def torrents_editTracker(self, hash: str, origUrl: str, newUrl: str):
@@ -980,7 +1150,6 @@ class _BaseQbittorrentClient:
         :param urls: URLs to remove, separated by |
         :return:
         """
-        urls = urls if isinstance(urls, str) else "|".join(urls)
         data = {"hash": hash, "urls": urls}
         return await self.send_request(f"{self.prefix}/torrents/removeTrackers", data)
 
@@ -993,8 +1162,6 @@ class _BaseQbittorrentClient:
         :param peers: The peer to add, or multiple peers separated by a pipe |. Each peer is a colon-separated host:port
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
-        peers = peers if isinstance(peers, str) else "|".join(peers)
         data = {"hashes": hashes, "peers": peers}
         return await self.send_request(f"{self.prefix}/torrents/addPeers", data)
 
@@ -1006,7 +1173,6 @@ class _BaseQbittorrentClient:
         hashes separated by |, to increase the priority of multiple torrents, or set to all, to increase the priority of all torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/increasePrio", data)
 
@@ -1018,7 +1184,6 @@ class _BaseQbittorrentClient:
         hashes separated by |, to decrease the priority of multiple torrents, or set to all, to decrease the priority of all torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/decreasePrio", data)
 
@@ -1030,7 +1195,6 @@ class _BaseQbittorrentClient:
          hashes separated by |, to set multiple torrents to the maximum priority, or set to all, to set all torrents to the maximum priority.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/topPrio", data)
 
@@ -1042,7 +1206,6 @@ class _BaseQbittorrentClient:
         hashes separated by |, to set multiple torrents to the minimum priority, or set to all, to set all torrents to the minimum priority.
         :return:
         """
-        hashes = hashes
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/bottomPrio", data)
 
@@ -1056,7 +1219,6 @@ class _BaseQbittorrentClient:
         :param priority: File priority to set (consult torrent contents API for possible values)
         :return:
         """
-        id = id if isinstance(id, str) else "|".join(id)
         data = {"hash": hash, "id": id, "priority": priority}
         return await self.send_request(f"{self.prefix}/torrents/filePrio", data)
 
@@ -1067,7 +1229,6 @@ class _BaseQbittorrentClient:
         :param hashes: hashes can contain multiple hashes separated by | or set to all
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/downloadLimit", data)
 
@@ -1081,7 +1242,6 @@ class _BaseQbittorrentClient:
         :param limit: limit is the download speed limit in bytes per second you want to set.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "limit": limit}
         return await self.send_request(f"{self.prefix}/torrents/setDownloadLimit", data)
 
@@ -1100,7 +1260,6 @@ class _BaseQbittorrentClient:
         -2 means the global limit should be used, -1 means no limit.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {
             "hashes": hashes,
             "ratioLimit": ratioLimit,
@@ -1115,7 +1274,6 @@ class _BaseQbittorrentClient:
         :param hashes: hashes can contain multiple hashes separated by | or set to all
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(f"{self.prefix}/torrents/uploadLimit", data)
 
@@ -1127,7 +1285,6 @@ class _BaseQbittorrentClient:
         :param limit: limit is the upload speed limit in bytes per second you want to set.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "limit": limit}
         return await self.send_request(f"{self.prefix}/torrents/setUploadLimit", data)
 
@@ -1140,7 +1297,6 @@ class _BaseQbittorrentClient:
          the torrent's location is unchanged.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "location": location}
         return await self.send_request(f"{self.prefix}/torrents/setLocation", data)
 
@@ -1162,7 +1318,6 @@ class _BaseQbittorrentClient:
         :param category: category is the torrent category you want to set.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "category": category}
         return await self.send_request(f"{self.prefix}/torrents/setCategory", data)
 
@@ -1200,9 +1355,6 @@ class _BaseQbittorrentClient:
         :param categories: categories can contain multiple cateogies separated by \n (%0A urlencoded)
         :return:
         """
-        categories = (
-            categories if isinstance(categories, str) else "%0A".join(categories)
-        )
         data = {"categories": categories}
         return await self.send_request(f"{self.prefix}/torrents/removeCategories", data)
 
@@ -1216,8 +1368,6 @@ class _BaseQbittorrentClient:
         :param tags: tags is the list of tags you want to add to passed torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
-        tags = tags if isinstance(tags, str) else ",".join(tags)
         data = {"hashes": hashes, "tags": tags}
         return await self.send_request(f"{self.prefix}/torrents/addTags", data)
 
@@ -1231,8 +1381,6 @@ class _BaseQbittorrentClient:
         :param tags: tags is the list of tags you want to remove from passed torrents. Empty list removes all tags from relevant torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
-        tags = tags if isinstance(tags, str) else ",".join(tags)
         data = {"hashes": hashes, "tags": tags}
         return await self.send_request(f"{self.prefix}/torrents/removeTags", data)
 
@@ -1250,7 +1398,6 @@ class _BaseQbittorrentClient:
         :param tags: tags is a list of tags you want to create. Can contain multiple tags separated by ,.
         :return:
         """
-        tags = tags if isinstance(tags, str) else ",".join(tags)
         data = {"tags": tags}
         return await self.send_request(f"{self.prefix}/torrents/createTags", data)
 
@@ -1260,7 +1407,6 @@ class _BaseQbittorrentClient:
         :param tags: tags is a list of tags you want to delete. Can contain multiple tags separated by ,.
         :return:
         """
-        tags = tags if isinstance(tags, str) else ",".join(tags)
         data = {"tags": tags}
         return await self.send_request(f"{self.prefix}/torrents/deleteTags", data)
 
@@ -1273,7 +1419,6 @@ class _BaseQbittorrentClient:
         :param enable: enable is a boolean, affects the torrents listed in hashes, default is false
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "enable": enable}
         return await self.send_request(
             f"{self.prefix}/torrents/setAutoManagement", data
@@ -1287,7 +1432,6 @@ class _BaseQbittorrentClient:
         multiple hashes separated by |, to toggle sequential download for multiple torrents, or set to all, to toggle sequential download for all torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(
             f"{self.prefix}/torrents/toggleSequentialDownload", data
@@ -1302,7 +1446,6 @@ class _BaseQbittorrentClient:
         or set to all, to toggle the first/last piece priority for all torrents.
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes}
         return await self.send_request(
             f"{self.prefix}/torrents/toggleFirstLastPiecePrio", data
@@ -1318,7 +1461,6 @@ class _BaseQbittorrentClient:
         :return:
         """
 
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "value": value}
         return await self.send_request(f"{self.prefix}/torrents/setForceStart", data)
 
@@ -1331,7 +1473,6 @@ class _BaseQbittorrentClient:
         :param value: value is a boolean, affects the torrents listed in hashes, default is false
         :return:
         """
-        hashes = hashes if isinstance(hashes, str) else "|".join(hashes)
         data = {"hashes": hashes, "value": value}
         return await self.send_request(f"{self.prefix}/torrents/setSuperSeeding", data)
 
@@ -1597,7 +1738,6 @@ class _BaseQbittorrentClient:
         :param names:  Name of the plugin to uninstall (e.g. "legittorrents"). Supports multiple names separated by |
         :return:
         """
-        names = names if isinstance(names, str) else "|".join(names)
         data = {"names": names}
         return await self.send_request(f"{self.prefix}/search/uninstallPlugin", data)
 
@@ -1608,7 +1748,6 @@ class _BaseQbittorrentClient:
         :param enable: Whether the plugins should be enabled
         :return:
         """
-        names = names if isinstance(names, str) else "|".join(names)
         data = {"names": names, "enable": enable}
         return await self.send_request(f"{self.prefix}/search/enablePlugin", data)
 
@@ -1623,6 +1762,64 @@ class _BaseQbittorrentClient:
     async def send_request(self, endpoint: str, data, method: str = "POST"):
         raise NotImplementedError
 
+    def stream_request(
+        self,
+        endpoint: str,
+        data,
+        method: str = "POST",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator:
+        """
+        Like send_request for endpoints replying with a JSON array, but yields
+        the decoded elements one by one while the body is still arriving
+        """
+        raise NotImplementedError
+
+
+def create_connector(
+    limit: int = DEFAULT_CONNECTION_LIMIT,
+    limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+    keepalive_timeout: Optional[float] = DEFAULT_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache: Optional[int] = DEFAULT_DNS_CACHE_TTL,
+    **kwargs,
+) -> aiohttp.TCPConnector:
+    """
+    Build a connection pool, pass it to many clients with connector=... to share it
+    :param limit: Max number of open connections, 0 means unlimited
+    :param limit_per_host: Max number of open connections to one host, 0 means unlimited
+    :param keepalive_timeout: Seconds an idle connection is kept for reuse
+    :param ttl_dns_cache: Seconds a DNS lookup is cached, None caches forever
+    :param kwargs: passed to aiohttp.TCPConnector
+    :return:
+    """
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+        **kwargs,
+    )
+
+
+def pool_stats(connector: aiohttp.BaseConnector) -> dict:
+    """
+    Connection statistics of a pool
+    :param connector:
+    :return: limit, limit_per_host, acquired (in use), idle, open and waiting (queued for a connection)
+    """
+    # aiohttp has no public accessors for these counters
+    acquired = len(getattr(connector, "_acquired", ()))
+    idle = sum(len(c) for c in getattr(connector, "_conns", {}).values())
+    waiting = sum(len(w) for w in getattr(connector, "_waiters", {}).values())
+    return {
+        "limit": connector.limit,
+        "limit_per_host": connector.limit_per_host,
+        "acquired": acquired,
+        "idle": idle,
+        "open": acquired + idle,
+        "waiting": waiting,
+    }
+
 
 class QbittorrentClient(_BaseQbittorrentClient):
     def __init__(
@@ -1631,8 +1828,46 @@ class QbittorrentClient(_BaseQbittorrentClient):
         username: Optional[str] = None,
         password: Optional[str] = None,
         timeout: Union[int, float, aiohttp.ClientTimeout] = DEFAULT_TIMEOUT,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        limit: int = DEFAULT_CONNECTION_LIMIT,
+        limit_per_host: int = DEFAULT_CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout: Optional[float] = DEFAULT_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache: Optional[int] = DEFAULT_DNS_CACHE_TTL,
+        coalesce: bool = True,
+        cache: Optional[ResponseCache] = None,
+        auto_login: bool = True,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[ConcurrencyLimiter] = None,
+        chunk_hashes: Optional[int] = None,
+        chunk_concurrency: int = DEFAULT_CHUNK_CONCURRENCY,
         **kwargs,
     ):
+        """
+        :param url: WebUI address
+        :param username:
+        :param password:
+        :param timeout: Total timeout of one request in seconds
+        :param connector: Shared connection pool, see create_connector. It is not closed together with the client.
+        When omitted the client owns a pool built from the following arguments
+        :param limit: Max number of open connections, 0 means unlimited
+        :param limit_per_host: Max number of open connections to one host, 0 means unlimited
+        :param keepalive_timeout: Seconds an idle connection is kept for reuse
+        :param ttl_dns_cache: Seconds a DNS lookup is cached, None caches forever
+        :param coalesce: Let concurrent identical read requests share one in-flight request.
+        The callers then receive the same result object, do not modify it in place
+        :param cache: Opt-in reply cache for slow-changing endpoints, e.g. ResponseCache().
+        Cached replies are shared as well, writes invalidate the entries they affect
+        :param auto_login: When a request gets 403 because the session expired, log in again with username
+        and password (one login shared by all waiting requests) and replay it. A second 403 raises IPBanedException
+        :param retry: Retry transient failures of idempotent endpoints with backoff, e.g. RetryPolicy()
+        :param circuit_breaker: Fail fast with CircuitOpenException while the WebUI is unresponsive, e.g. CircuitBreaker()
+        :param limiter: Cap the requests in flight against the WebUI, e.g. ConcurrencyLimiter(mode="aimd")
+        :param chunk_hashes: Split writes on more hashes than this into several requests, e.g. torrents_pause.
+        Such writes then return a ChunkedResult listing the failed chunks instead of raising
+        :param chunk_concurrency: Max number of chunks of one write in flight
+        :param kwargs: loads, dumps and extra arguments for session.request
+        """
         self.timeout = (
             aiohttp.ClientTimeout(timeout)
             if isinstance(timeout, (int, float))
@@ -1646,9 +1881,36 @@ class QbittorrentClient(_BaseQbittorrentClient):
             self.kwargs.pop("dumps") if "dumps" in self.kwargs else DEFAULT_JSON_ENCODER
         )
         super().__init__(url, username, password, loads, dumps)
+        connector_owner = connector is None
+        if connector is None:
+            connector = create_connector(
+                limit, limit_per_host, keepalive_timeout, ttl_dns_cache
+            )
+        self.connector = connector
         self.client_session = aiohttp.ClientSession(
-            json_serialize=self.dumps, cookie_jar=aiohttp.CookieJar(unsafe=True)
+            connector=connector,
+            connector_owner=connector_owner,
+            json_serialize=self.dumps,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
         )
+        self.coalesce = coalesce
+        self.cache = cache
+        self.auto_login = auto_login
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.limiter = limiter
+        self.chunk_hashes = chunk_hashes
+        self.chunk_concurrency = chunk_concurrency
+        self._session_generation = 0
+        self._login_task: Optional[asyncio.Future] = None
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    def pool_stats(self) -> dict:
+        """
+        Statistics of the connection pool used by this client
+        :return: limit, limit_per_host, acquired (in use), idle, open and waiting (queued for a connection)
+        """
+        return pool_stats(self.connector)
 
     def __getattr__(self, func: str):
         parts = func.split("_")
@@ -1662,10 +1924,158 @@ class QbittorrentClient(_BaseQbittorrentClient):
         return pfunc
 
     async def send_request(self, endpoint: str, data, method: str = "POST"):
-        if isinstance(data, dict):
-            for k, v in data.items():
-                if not isinstance(v, str):
-                    data[k] = str(v)
+        name = endpoint_name(endpoint)
+        if type(data) is dict:
+            if self.chunk_hashes and name in CHUNKED_ENDPOINTS:
+                chunks = split_hashes(data.get("hashes"), self.chunk_hashes)
+                if len(chunks) > 1:
+                    return await self._chunked_request(endpoint, data, method, chunks)
+            data = get_encoder(endpoint)(data)
+        if name in READ_ENDPOINTS and (data is None or type(data) is dict):
+            key = (method, endpoint, frozenset(data.items()) if data else None)
+            cache = self.cache
+            if cache is not None and name in cache.ttls:
+                value = cache.get(key)
+                if value is not MISSING:
+                    return value
+                generation = cache.generation(name)
+                value = await self._read_request(key, endpoint, data, method)
+                cache.put(name, key, value, generation)
+                return value
+            return await self._read_request(key, endpoint, data, method)
+        try:
+            return await self._send_request(endpoint, data, method)
+        finally:
+            if self.cache is not None and name in INVALIDATES:
+                self.cache.invalidate(*INVALIDATES[name])
+
+    async def _chunked_request(
+        self, endpoint: str, data: dict, method: str, chunks: List[List[str]]
+    ) -> ChunkedResult:
+        result = ChunkedResult()
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def send(chunk: List[str]):
+            async with semaphore:
+                try:
+                    reply = await self.send_request(
+                        endpoint, dict(data, hashes=chunk), method
+                    )
+                except (BaseQbittorrentException, *TRANSIENT_ERRORS) as e:
+                    result.failures.append((chunk, e))
+                else:
+                    result.results.append((chunk, reply))
+
+        await asyncio.gather(*map(send, chunks))
+        return result
+
+    async def _read_request(
+        self, key: tuple, endpoint: str, data: Optional[dict], method: str
+    ):
+        if not self.coalesce:
+            return await self._send_request(endpoint, data, method)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send_request(endpoint, data, method))
+            self._inflight[key] = task
+            task.add_done_callback(partial(self._inflight_done, key))
+        # shield: one cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    def _inflight_done(self, key: tuple, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller is gone
+
+    async def _send_request(self, endpoint: str, data, method: str):
+        generation = self._session_generation
+        try:
+            return await self._http_request(endpoint, data, method)
+        except IPBanedException:
+            if not self._can_reauthenticate(endpoint):
+                raise
+            await self._reauthenticate(generation)
+            if not (data is None or type(data) is dict):
+                raise  # a consumed multipart body can not be replayed
+        # a second 403 after logging in again really is a ban
+        return await self._http_request(endpoint, data, method)
+
+    async def _http_request(self, endpoint: str, data, method: str):
+        if self.retry is None and self.circuit_breaker is None:
+            return await self._raw_request(endpoint, data, method)
+        return await self._attempt(
+            endpoint, data, lambda: self._raw_request(endpoint, data, method)
+        )
+
+    def _transient_errors(self) -> tuple:
+        return TRANSIENT_ERRORS if self.retry is None else self.retry.retry_on
+
+    async def _attempt(self, endpoint: str, data, send, settle: bool = True):
+        """
+        Run send under the retry policy and the circuit breaker
+        :param send: coroutine function making one attempt
+        :param settle: Record a successful attempt in the breaker, False leaves that to the caller
+        :return: what send returned
+        """
+        retry = self.retry
+        breaker = self.circuit_breaker
+        attempts = 1
+        transient = self._transient_errors()
+        # a consumed multipart body can not be sent again
+        if (
+            retry is not None
+            and (data is None or type(data) is dict)
+            and retry.retryable(endpoint_name(endpoint))
+        ):
+            attempts = retry.attempts
+        attempt = 0
+        while True:
+            attempt += 1
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                result = await send()
+            except transient:
+                if breaker is not None:
+                    breaker.record_failure()
+                if attempt >= attempts:
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+                continue
+            except BaseQbittorrentException:
+                if breaker is not None:
+                    breaker.record_success()  # the server did answer
+                raise
+            except BaseException:
+                if breaker is not None:
+                    breaker.release()
+                raise
+            if breaker is not None and settle:
+                breaker.record_success()
+            return result
+
+    async def _raw_request(self, endpoint: str, data, method: str):
+        limiter = self.limiter
+        if limiter is None:
+            return await self._do_request(endpoint, data, method)
+        await limiter.acquire()
+        start = time.monotonic()
+        try:
+            result = await self._do_request(endpoint, data, method)
+        except BaseQbittorrentException:
+            limiter.release(time.monotonic() - start)
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            limiter.release()
+            raise
+        except BaseException:
+            limiter.release(failed=True)
+            raise
+        limiter.release(time.monotonic() - start)
+        return result
+
+    async def _do_request(self, endpoint: str, data, method: str):
         async with self.client_session.request(
             method,
             urljoin(self.url, endpoint),
@@ -1673,23 +2083,159 @@ class QbittorrentClient(_BaseQbittorrentClient):
             timeout=self.timeout,
             **self.kwargs,
         ) as resp:
-            status = resp.status
-            if status != 200:
-                if status == 403:
-                    raise IPBanedException(await resp.text())
-                elif status == 404:
-                    raise HashNotFoundException(await resp.text())
-                elif status == 409:
-                    raise ApiFailedException(await resp.text())
-                else:
-                    raise BaseQbittorrentException(await resp.text())
+            await self.check_status(resp)
+            return self.decode_response(endpoint, resp, await resp.read())
+
+    def _can_reauthenticate(self, endpoint: str) -> bool:
+        return (
+            self.auto_login
+            and self.username is not None
+            and endpoint_name(endpoint) not in ("auth/login", "auth/logout")
+        )
+
+    async def _reauthenticate(self, generation: int):
+        """
+        Log in again after a 403, at most one login runs at a time and
+        requests which started before a finished login just replay
+        :param generation: _session_generation when the failed request was sent
+        :return:
+        """
+        if generation != self._session_generation:
+            return
+        task = self._login_task
+        if task is None:
+            task = self._login_task = asyncio.ensure_future(self._login())
+        await asyncio.shield(task)
+
+    async def _login(self):
+        try:
+            await self.auth_login()
+            self._session_generation += 1
+        finally:
+            self._login_task = None
+
+    async def stream_request(
+        self,
+        endpoint: str,
+        data,
+        method: str = "POST",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator:
+        if type(data) is dict:
+            data = get_encoder(endpoint)(data)
+        generation = self._session_generation
+        for attempt in range(2):
+            async with self._open_stream(endpoint, data, method) as resp:
+                expired = (
+                    resp.status == 403
+                    and attempt == 0
+                    and self._can_reauthenticate(endpoint)
+                )
+                if not expired:
+                    await self.check_status(resp)
+                    parser = JsonArrayParser()
+                    loads = self.loads
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        for element in parser.feed(chunk):
+                            yield loads(element)
+                        # let other tasks run between two chunks
+                        await asyncio.sleep(0)
+                    return
+            # outside the limiter slot, the login needs one of its own
+            await self._reauthenticate(generation)
+
+    @asynccontextmanager
+    async def _open_stream(self, endpoint: str, data, method: str):
+        """
+        Open a response whose body is read by the caller. The limiter slot is
+        held until the body is consumed, its latency is the time to the
+        headers. Only opening the connection is retried, a broken body is not,
+        elements may already have been handed out.
+        """
+        limiter = self.limiter
+        breaker = self.circuit_breaker
+        transient = self._transient_errors()
+        if limiter is not None:
+            await limiter.acquire()
+        start = time.monotonic()
+        latency = None
+        failed = False
+        try:
+            try:
+                resp = await self._attempt(
+                    endpoint,
+                    data,
+                    lambda: self.client_session.request(
+                        method,
+                        urljoin(self.url, endpoint),
+                        data=data,
+                        timeout=self.timeout,
+                        **self.kwargs,
+                    ),
+                    settle=False,
+                )
+            except transient:
+                failed = True
+                raise
+            latency = time.monotonic() - start
             try:
-                return await resp.json(loads=self.loads)
-            except:
-                return await resp.text()
+                yield resp
+            except transient:
+                if breaker is not None:
+                    breaker.record_failure()
+                latency, failed = None, True
+                raise
+            except BaseQbittorrentException:
+                if breaker is not None:
+                    breaker.record_success()  # the server did answer
+                raise
+            except BaseException:  # cancelled, or the consumer stopped early
+                if breaker is not None:
+                    breaker.release()
+                latency = None
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+            finally:
+                resp.release()
+        finally:
+            if limiter is not None:
+                limiter.release(latency, failed)
+
+    @staticmethod
+    async def check_status(resp: aiohttp.ClientResponse):
+        status = resp.status
+        if status != 200:
+            if status == 403:
+                raise IPBanedException(await resp.text())
+            elif status == 404:
+                raise HashNotFoundException(await resp.text())
+            elif status == 409:
+                raise ApiFailedException(await resp.text())
+            else:
+                raise BaseQbittorrentException(await resp.text())
+
+    def decode_response(self, endpoint: str, resp: aiohttp.ClientResponse, body: bytes):
+        """
+        Decode a reply body by its Content-Type, or by the endpoint's known
+        result type when the server does not label JSON as such
+        :param endpoint:
+        :param resp:
+        :param body: The raw body, handed to loads without a str round trip
+        :return:
+        """
+        if body and (
+            resp.content_type == "application/json"
+            or endpoint_name(endpoint) in JSON_ENDPOINTS
+        ):
+            return self.loads(body)
+        return body.decode(resp.charset or "utf-8")
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._torrent_waiter is not None:
+            await self._torrent_waiter.close()
         await self.client_session.close()
@@ -0,0 +1,264 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from array import array
+from typing import Dict, Iterable, List, Optional, Union
+
+from aioqb.sync import MainDataMirror, MirrorListener
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, fall back to plain python loops
+    np = None
+
+Number = Union[int, float]
+
+# column -> array typecode. q columns hold integers, d columns floats
+NUMERIC_COLUMNS: Dict[str, str] = {
+    "size": "q",
+    "total_size": "q",
+    "amount_left": "q",
+    "downloaded": "q",
+    "uploaded": "q",
+    "dlspeed": "q",
+    "upspeed": "q",
+    "eta": "q",
+    "num_seeds": "q",
+    "num_leechs": "q",
+    "num_complete": "q",
+    "num_incomplete": "q",
+    "added_on": "q",
+    "completion_on": "q",
+    "progress": "d",
+    "ratio": "d",
+}
+
+# low cardinality string columns, stored dictionary encoded
+STRING_COLUMNS = ("state", "category", "save_path", "tracker")
+
+
+class StringColumn:
+    """
+    Dictionary encoded string column: every distinct string is stored once
+    and rows only hold its integer code
+    """
+
+    def __init__(self):
+        self.codes = array("q")
+        self.values: List[str] = []
+        self.lookup: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+
+class TorrentTable(MirrorListener):
+    """
+    Array backed, column oriented torrent table for aggregate statistics.
+    Numbers live in array.array buffers which numpy, when installed, reads
+    without copying. Attach it to a MainDataMirror to feed it from deltas.
+    """
+
+    def __init__(self, mirror: Optional[MainDataMirror] = None):
+        self.mirror = mirror
+        self.hashes: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.numeric: Dict[str, array] = {
+            name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()
+        }
+        self.strings: Dict[str, StringColumn] = {
+            name: StringColumn() for name in STRING_COLUMNS
+        }
+        if mirror is not None:
+            for hash, torrent in mirror.torrents.items():
+                self.torrent_updated(hash, None, torrent)
+            mirror.add_listener(self)
+
+    @classmethod
+    def from_torrents(cls, torrents: Iterable[dict]) -> "TorrentTable":
+        """
+        Build a table from a torrents_info reply
+        :param torrents:
+        :return:
+        """
+        table = cls()
+        for torrent in torrents:
+            table.torrent_updated(torrent["hash"], None, torrent)
+        return table
+
+    def close(self):
+        """
+        Stop following the mirror
+        :return:
+        """
+        if self.mirror is not None:
+            self.mirror.remove_listener(self)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, hash: str):
+        return hash in self.rows
+
+    def _set(self, row: int, partial: dict):
+        for name, column in self.numeric.items():
+            if name in partial:
+                value = partial[name]
+                column[row] = int(value) if column.typecode == "q" else float(value)
+        for name, column in self.strings.items():
+            if name in partial:
+                column.codes[row] = column.encode(partial[name] or "")
+
+    def torrent_updated(self, hash: str, torrent: Optional[dict], partial: dict):
+        row = self.rows.get(hash)
+        if row is None:
+            row = self.rows[hash] = len(self.hashes)
+            self.hashes.append(hash)
+            for column in self.numeric.values():
+                column.append(0)
+            for column in self.strings.values():
+                column.codes.append(column.encode(""))
+        self._set(row, partial)
+
+    def torrent_removed(self, hash: str, torrent: dict):
+        row = self.rows.pop(hash, None)
+        if row is None:
+            return
+        # move the last row into the hole so the columns stay dense
+        last = len(self.hashes) - 1
+        if row != last:
+            moved = self.hashes[last]
+            self.hashes[row] = moved
+            self.rows[moved] = row
+            for column in self.numeric.values():
+                column[row] = column[last]
+            for column in self.strings.values():
+                column.codes[row] = column.codes[last]
+        self.hashes.pop()
+        for column in self.numeric.values():
+            column.pop()
+        for column in self.strings.values():
+            column.codes.pop()
+
+    def mirror_cleared(self):
+        self.hashes.clear()
+        self.rows.clear()
+        for name, column in self.numeric.items():
+            self.numeric[name] = array(column.typecode)
+        for name in self.strings:
+            self.strings[name] = StringColumn()
+
+    def row(self, hash: str) -> dict:
+        """
+        Reassemble one torrent from the columns
+        :param hash:
+        :return:
+        """
+        row = self.rows[hash]
+        data = {"hash": hash}
+        for name, column in self.numeric.items():
+            data[name] = column[row]
+        for name, column in self.strings.items():
+            data[name] = column[row]
+        return data
+
+    def column(self, name: str):
+        """
+        A copy of a column, a numpy array when numpy is installed
+        :param name: numeric or string column name, strings are decoded
+        :return:
+        """
+        if name in self.strings:
+            column = self.strings[name]
+            return [column.values[code] for code in column.codes]
+        if np is not None:
+            return np.array(self.numeric[name])
+        return array(self.numeric[name].typecode, self.numeric[name])
+
+    def sum(self, name: str) -> Number:
+        column = self.numeric[name]
+        if np is not None and column:
+            return np.frombuffer(column, dtype=column.typecode).sum().item()
+        return sum(column)
+
+    def mean(self, name: str) -> float:
+        column = self.numeric[name]
+        if not column:
+            return 0.0
+        if np is not None:
+            return np.frombuffer(column, dtype=column.typecode).mean().item()
+        return sum(column) / len(column)
+
+    def quantile(self, name: str, q: float) -> float:
+        """
+        Linear interpolated quantile of a numeric column
+        :param name: numeric column name
+        :param q: between 0 and 1
+        :return:
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        column = self.numeric[name]
+        if not column:
+            return 0.0
+        if np is not None:
+            return np.quantile(np.frombuffer(column, dtype=column.typecode), q).item()
+        ordered = sorted(column)
+        pos = (len(ordered) - 1) * q
+        low = int(pos)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+    def group_by(
+        self, key: str, name: Optional[str] = None, agg: str = "sum"
+    ) -> Dict[str, Number]:
+        """
+        Aggregate a numeric column per value of a string column,
+        e.g. group_by("category", "dlspeed")
+        :param key: string column to group by
+        :param name: numeric column to aggregate, not needed for agg="count"
+        :param agg: sum, mean or count
+        :return: group value -> aggregate, groups without rows are left out
+        """
+        if agg not in ("sum", "mean", "count"):
+            raise ValueError("agg must be one of sum, mean, count")
+        strings = self.strings[key]
+        if not strings.codes:
+            return {}
+        if np is not None:
+            codes = np.frombuffer(strings.codes, dtype="q")
+            size = len(strings.values)
+            counts = np.bincount(codes, minlength=size)
+            if agg == "count":
+                result = counts
+            else:
+                column = self.numeric[name]
+                values = np.frombuffer(column, dtype=column.typecode)
+                result = np.bincount(codes, weights=values, minlength=size)
+                if agg == "mean":
+                    result = result / np.maximum(counts, 1)
+                elif column.typecode == "q":
+                    result = result.astype("q")
+            return {
+                strings.values[code]: result[code].item()
+                for code in np.nonzero(counts)[0]
+            }
+        counts: Dict[int, int] = {}
+        totals: Dict[int, Number] = {}
+        values = self.numeric[name] if agg != "count" else None
+        for row, code in enumerate(strings.codes):
+            counts[code] = counts.get(code, 0) + 1
+            if values is not None:
+                totals[code] = totals.get(code, 0) + values[row]
+        if agg == "count":
+            return {strings.values[c]: n for c, n in counts.items()}
+        if agg == "mean":
+            return {strings.values[c]: totals[c] / counts[c] for c in counts}
+        return {strings.values[c]: totals[c] for c in totals}
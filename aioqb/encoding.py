@@ -0,0 +1,99 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+from aioqb.endpoints import endpoint_name
+from aioqb.utils import DEFAULT_JSON_ENCODER
+
+PIPE = "|"
+NEWLINE = "\n"
+COMMA = ","
+
+
+def _encode_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+# exact type -> converter, subclasses are resolved once and cached here
+_CONVERTERS: Dict[type, Callable[[Any], str]] = {
+    str: str,
+    bool: _encode_bool,
+    int: str,
+    float: repr,
+    bytes: bytes.decode,
+    dict: DEFAULT_JSON_ENCODER,
+}
+_SEQUENCES = (list, tuple, set, frozenset)
+
+# list separators which differ from the default pipe, per endpoint and field
+ENDPOINT_SEPARATORS: Dict[str, Dict[str, str]] = {
+    "torrents/add": {"urls": NEWLINE, "tags": COMMA},
+    "torrents/addTrackers": {"urls": NEWLINE},
+    "torrents/removeCategories": {"categories": NEWLINE},
+    "torrents/addTags": {"tags": COMMA},
+    "torrents/removeTags": {"tags": COMMA},
+    "torrents/createTags": {"tags": COMMA},
+    "torrents/deleteTags": {"tags": COMMA},
+}
+
+
+def encode_value(value) -> str:
+    """
+    Encode one scalar the way the WebUI expects it, booleans become true/false
+    :param value:
+    :return:
+    """
+    converter = _CONVERTERS.get(type(value))
+    if converter is None:
+        converter = str
+        for base in (bool, int, float, str, bytes, dict):
+            if isinstance(value, base):
+                converter = _CONVERTERS[base]
+                break
+        _CONVERTERS[type(value)] = converter
+    return converter(value)
+
+
+class RequestEncoder:
+    """
+    Turns the parameters of one endpoint into form fields. None values are
+    left out and lists are joined with the endpoint's separator.
+    """
+
+    __slots__ = ("separators",)
+
+    def __init__(self, separators: Dict[str, str] = None):
+        self.separators = separators or {}
+
+    def __call__(self, data: dict) -> Dict[str, str]:
+        encoded = {}
+        separators = self.separators
+        converters = _CONVERTERS
+        for key, value in data.items():
+            if value is None:
+                continue
+            kind = type(value)
+            if kind is str:
+                encoded[key] = value
+            elif kind in _SEQUENCES:
+                encoded[key] = separators.get(key, PIPE).join(
+                    v if type(v) is str else encode_value(v) for v in value
+                )
+            else:
+                converter = converters.get(kind)
+                encoded[key] = (
+                    converter(value) if converter is not None else encode_value(value)
+                )
+        return encoded
+
+
+@lru_cache(maxsize=None)
+def get_encoder(endpoint: str) -> RequestEncoder:
+    """
+    The cached encoder of an endpoint
+    :param endpoint: e.g. /api/v2/torrents/addTags
+    :return:
+    """
+    return RequestEncoder(ENDPOINT_SEPARATORS.get(endpoint_name(endpoint)))
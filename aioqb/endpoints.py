@@ -0,0 +1,147 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from functools import lru_cache
+
+# endpoint names are the last two path components, e.g. torrents/info
+
+
+@lru_cache(maxsize=None)
+def endpoint_name(endpoint: str) -> str:
+    """
+    /api/v2/torrents/info -> torrents/info
+    :param endpoint:
+    :return:
+    """
+    return "/".join(endpoint.rsplit("/", 2)[-2:])
+
+
+# endpoints replying with a JSON document, decoded as such even when the
+# server does not label the reply application/json
+JSON_ENDPOINTS = frozenset(
+    (
+        "app/buildInfo",
+        "app/preferences",
+        "log/main",
+        "log/peers",
+        "sync/maindata",
+        "sync/torrentPeers",
+        "transfer/info",
+        "torrents/info",
+        "torrents/properties",
+        "torrents/trackers",
+        "torrents/webseeds",
+        "torrents/files",
+        "torrents/pieceStates",
+        "torrents/pieceHashes",
+        "torrents/downloadLimit",
+        "torrents/uploadLimit",
+        "torrents/categories",
+        "torrents/tags",
+        "rss/items",
+        "rss/rules",
+        "rss/matchingArticles",
+        "search/start",
+        "search/status",
+        "search/results",
+        "search/plugins",
+    )
+)
+
+
+# endpoints which only read state, safe to share between concurrent callers
+READ_ENDPOINTS = frozenset(
+    (
+        "app/version",
+        "app/webapiVersion",
+        "app/buildInfo",
+        "app/preferences",
+        "app/defaultSavePath",
+        "log/main",
+        "log/peers",
+        "sync/maindata",
+        "sync/torrentPeers",
+        "transfer/info",
+        "transfer/speedLimitsMode",
+        "transfer/downloadLimit",
+        "transfer/uploadLimit",
+        "torrents/info",
+        "torrents/properties",
+        "torrents/trackers",
+        "torrents/webseeds",
+        "torrents/files",
+        "torrents/pieceStates",
+        "torrents/pieceHashes",
+        "torrents/downloadLimit",
+        "torrents/uploadLimit",
+        "torrents/categories",
+        "torrents/tags",
+        "rss/items",
+        "rss/rules",
+        "rss/matchingArticles",
+        "search/status",
+        "search/results",
+        "search/plugins",
+    )
+)
+
+# writes which leave the server in the same state when sent twice
+IDEMPOTENT_WRITES = frozenset(
+    (
+        "app/setPreferences",
+        "transfer/setDownloadLimit",
+        "transfer/setUploadLimit",
+        "transfer/banPeers",
+        "torrents/pause",
+        "torrents/resume",
+        "torrents/delete",
+        "torrents/filePrio",
+        "torrents/setDownloadLimit",
+        "torrents/setShareLimits",
+        "torrents/setUploadLimit",
+        "torrents/setLocation",
+        "torrents/rename",
+        "torrents/setCategory",
+        "torrents/editCategory",
+        "torrents/removeCategories",
+        "torrents/addTags",
+        "torrents/removeTags",
+        "torrents/createTags",
+        "torrents/deleteTags",
+        "torrents/setAutoManagement",
+        "torrents/setForceStart",
+        "torrents/setSuperSeeding",
+        "rss/setRule",
+        "rss/removeRule",
+        "rss/markAsRead",
+        "search/enablePlugin",
+    )
+)
+# everything else (toggles, priorities, add, recheck, search/start, ...)
+# must not be sent twice. Renames, removeTrackers, createCategory and
+# search/stop and delete are left out as well: a replay after a lost reply
+# fails although the first write worked, renames and removeTrackers find the
+# old path or tracker gone (409), createCategory finds the category there
+# (409) and the search job id is unknown once deleted (404)
+
+IDEMPOTENT_ENDPOINTS = READ_ENDPOINTS | IDEMPOTENT_WRITES
+
+# writes -> the read endpoints whose replies they change
+INVALIDATES = {
+    "app/setPreferences": ("app/preferences", "app/defaultSavePath"),
+    "torrents/add": ("torrents/categories", "torrents/tags"),
+    "torrents/setCategory": ("torrents/categories",),
+    "torrents/createCategory": ("torrents/categories",),
+    "torrents/editCategory": ("torrents/categories",),
+    "torrents/removeCategories": ("torrents/categories",),
+    "torrents/addTags": ("torrents/tags",),
+    "torrents/createTags": ("torrents/tags",),
+    "torrents/deleteTags": ("torrents/tags",),
+    "rss/setRule": ("rss/rules", "rss/matchingArticles"),
+    "rss/renameRule": ("rss/rules", "rss/matchingArticles"),
+    "rss/removeRule": ("rss/rules", "rss/matchingArticles"),
+    "search/installPlugin": ("search/plugins",),
+    "search/uninstallPlugin": ("search/plugins",),
+    "search/enablePlugin": ("search/plugins",),
+    "search/updatePlugins": ("search/plugins",),
+}
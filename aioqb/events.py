@@ -0,0 +1,280 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from aioqb.sync import MainDataMirror, MirrorListener
+
+
+class TorrentEvent:
+    """
+    Base class of everything the EventBus emits
+    """
+
+    __slots__ = ("hash",)
+
+    def __init__(self, hash: str):
+        self.hash = hash
+
+    @property
+    def key(self) -> Tuple:
+        """
+        Events with the same key replace each other in a conflating subscription
+        """
+        return type(self), self.hash
+
+    def __repr__(self):
+        fields = ", ".join(
+            "{}={!r}".format(name, getattr(self, name))
+            for cls in reversed(type(self).__mro__)
+            for name in getattr(cls, "__slots__", ())
+        )
+        return "{}({})".format(type(self).__name__, fields)
+
+
+class TorrentAdded(TorrentEvent):
+    __slots__ = ("torrent",)
+
+    def __init__(self, hash: str, torrent: dict):
+        super().__init__(hash)
+        self.torrent = torrent
+
+
+class TorrentRemoved(TorrentEvent):
+    __slots__ = ("torrent",)
+
+    def __init__(self, hash: str, torrent: dict):
+        super().__init__(hash)
+        self.torrent = torrent
+
+
+class TorrentCompleted(TorrentEvent):
+    __slots__ = ()
+
+
+class _ValueChanged(TorrentEvent):
+    __slots__ = ("old", "new")
+
+    def __init__(self, hash: str, old, new):
+        super().__init__(hash)
+        self.old = old
+        self.new = new
+
+
+class StateChanged(_ValueChanged):
+    __slots__ = ()
+
+
+class CategoryChanged(_ValueChanged):
+    __slots__ = ()
+
+
+class TagsChanged(_ValueChanged):
+    __slots__ = ()
+
+
+class SpeedThresholdCrossed(_ValueChanged):
+    """
+    dlspeed or upspeed moved across a configured threshold, rising tells the direction
+    """
+
+    __slots__ = ("field", "threshold", "rising")
+
+    def __init__(self, hash: str, field: str, old, new, threshold: int):
+        super().__init__(hash, old, new)
+        self.field = field
+        self.threshold = threshold
+        self.rising = new >= threshold
+
+    @property
+    def key(self) -> Tuple:
+        return type(self), self.hash, self.field
+
+
+class Subscription:
+    """
+    Bounded event queue of one subscriber. When full the oldest event is
+    dropped, in conflating mode a newer event replaces a pending one with
+    the same key instead of queueing behind it.
+    """
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        maxsize: int = 1024,
+        conflate: bool = False,
+        types: Optional[Iterable[Type[TorrentEvent]]] = None,
+    ):
+        self.bus = bus
+        self.maxsize = maxsize
+        self.conflate = conflate
+        self.types = tuple(types) if types is not None else None
+        self.dropped = 0
+        self._queue = OrderedDict() if conflate else deque()
+        self._waiter: Optional[asyncio.Event] = None
+        self.closed = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    def put(self, event: TorrentEvent):
+        if self.closed or (
+            self.types is not None and not isinstance(event, self.types)
+        ):
+            return
+        queue = self._queue
+        if self.conflate:
+            key = event.key
+            if key in queue:
+                del queue[key]
+            elif len(queue) >= self.maxsize:
+                queue.popitem(last=False)
+                self.dropped += 1
+            queue[key] = event
+        else:
+            if len(queue) >= self.maxsize:
+                queue.popleft()
+                self.dropped += 1
+            queue.append(event)
+        if self._waiter is not None:
+            self._waiter.set()
+
+    def get_nowait(self) -> TorrentEvent:
+        if not self._queue:
+            raise asyncio.QueueEmpty
+        if self.conflate:
+            return self._queue.popitem(last=False)[1]
+        return self._queue.popleft()
+
+    async def get(self) -> TorrentEvent:
+        """
+        :raise StopAsyncIteration: when the subscription is closed and drained
+        :return:
+        """
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+            if self._waiter is None:
+                self._waiter = asyncio.Event()
+            self._waiter.clear()
+            await self._waiter.wait()
+        return self.get_nowait()
+
+    def close(self):
+        """
+        Stop receiving events, pending ones can still be read and a blocked
+        consumer is woken up
+        :return:
+        """
+        self.closed = True
+        self.bus.unsubscribe(self)
+        if self._waiter is not None:
+            self._waiter.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TorrentEvent:
+        return await self.get()
+
+
+class EventBus(MirrorListener):
+    """
+    Turns main data deltas into typed events and fans them out to
+    subscribers, so one poller can serve every consumer. The first full
+    update of a fresh (or cleared) mirror only primes it, the torrents it
+    lists are not reported as added unless emit_initial is set.
+    """
+
+    def __init__(
+        self,
+        mirror: MainDataMirror,
+        speed_thresholds: Optional[Dict[str, int]] = None,
+        emit_initial: bool = False,
+    ):
+        """
+        :param mirror: The mirror whose deltas are turned into events
+        :param speed_thresholds: e.g. {"dlspeed": 1048576} emits SpeedThresholdCrossed
+        when a torrent's dlspeed rises above or falls below 1MiB/s
+        :param emit_initial: Emit TorrentAdded for every torrent of the first full update,
+        with many torrents this floods the subscriptions and drops the oldest events
+        """
+        self.mirror = mirror
+        self.speed_thresholds = speed_thresholds or {}
+        self.emit_initial = emit_initial
+        self.subscriptions: List[Subscription] = []
+        mirror.add_listener(self)
+
+    def subscribe(
+        self,
+        maxsize: int = 1024,
+        conflate: bool = False,
+        types: Optional[Iterable[Type[TorrentEvent]]] = None,
+    ) -> Subscription:
+        """
+        Register a new subscriber
+        :param maxsize: Max number of pending events before the oldest is dropped
+        :param conflate: Keep only the latest pending event per torrent and kind
+        :param types: Only receive these event classes
+        :return:
+        """
+        subscription = Subscription(self, maxsize, conflate, types)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def close(self):
+        """
+        Detach from the mirror and close every subscription
+        :return:
+        """
+        self.mirror.remove_listener(self)
+        for subscription in list(self.subscriptions):
+            subscription.close()
+
+    def emit(self, event: TorrentEvent):
+        for subscription in self.subscriptions:
+            subscription.put(event)
+
+    def torrent_updated(self, hash: str, torrent: Optional[dict], partial: dict):
+        if not self.subscriptions:
+            return
+        if torrent is None:
+            # rid is only advanced after the merge, 0 means the initial sync
+            if self.emit_initial or self.mirror.rid:
+                self.emit(TorrentAdded(hash, partial))
+            return
+        if "progress" in partial:
+            if partial["progress"] >= 1 and torrent.get("progress", 0) < 1:
+                self.emit(TorrentCompleted(hash))
+        for field, cls in (
+            ("state", StateChanged),
+            ("category", CategoryChanged),
+            ("tags", TagsChanged),
+        ):
+            if field in partial and partial[field] != torrent.get(field):
+                self.emit(cls(hash, torrent.get(field), partial[field]))
+        for field, threshold in self.speed_thresholds.items():
+            if field in partial:
+                old = torrent.get(field, 0)
+                new = partial[field]
+                if (old >= threshold) != (new >= threshold):
+                    self.emit(SpeedThresholdCrossed(hash, field, old, new, threshold))
+
+    def torrent_removed(self, hash: str, torrent: dict):
+        if self.subscriptions:
+            self.emit(TorrentRemoved(hash, torrent))
+
+    async def run(self, **kwargs):
+        """
+        Drive the mirror with client.watch_maindata until cancelled
+        :param kwargs: passed to watch_maindata
+        :return:
+        """
+        async for _ in self.mirror.client.watch_maindata(mirror=self.mirror, **kwargs):
+            pass
@@ -44,3 +44,16 @@ class ApiFailedException(BaseQbittorrentException):
 
     def __str__(self):
         return "{}: {}".format(self.__class__.__name__, self.msg)
+
+
+class CircuitOpenException(BaseQbittorrentException):
+    """
+    熔断中, webui 暂时无响应, 请求没有发出
+    """
+
+    def __init__(self, msg: str):
+        super().__init__(msg)
+        self.msg = msg
+
+    def __str__(self):
+        return "{}: {}".format(self.__class__.__name__, self.msg)
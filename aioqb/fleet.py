@@ -0,0 +1,223 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from aioqb.client import _BaseQbittorrentClient
+from aioqb.exceptions import HashNotFoundException
+from aioqb.sync import MainDataMirror
+
+DEFAULT_DEADLINE = 10.0
+NODE_KEY = "node"
+
+
+class FleetResult:
+    """
+    Outcome of one call fanned out across nodes. Nodes which failed or
+    missed the deadline are listed in errors, the others in results.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.errors) and bool(self.results)
+
+    def merged(self) -> List[dict]:
+        """
+        Concatenate list results into copies of the items tagged with their node
+        under "node", the replies themselves may be shared with other callers
+        :return:
+        """
+        return [
+            dict(item, **{NODE_KEY: node})
+            for node, result in self.results.items()
+            for item in result
+        ]
+
+    def __repr__(self):
+        return "FleetResult(ok={}, errors={})".format(
+            sorted(self.results), {k: repr(v) for k, v in self.errors.items()}
+        )
+
+
+class FleetClient:
+    """
+    Many qbittorrent instances behind one object. Calls fan out concurrently
+    with a deadline per node, slow or failing nodes only show up in
+    FleetResult.errors, and per-hash operations are routed to the node
+    which owns the hash.
+    """
+
+    def __init__(
+        self,
+        clients: Dict[str, _BaseQbittorrentClient],
+        deadline: float = DEFAULT_DEADLINE,
+    ):
+        """
+        :param clients: node name -> client
+        :param deadline: Seconds each node gets to answer one call
+        """
+        self.clients = clients
+        self.deadline = deadline
+        self.owners: Dict[str, str] = {}  # torrent hash -> node
+        self.mirrors: Dict[str, MainDataMirror] = {
+            node: MainDataMirror(client) for node, client in clients.items()
+        }
+
+    async def call(
+        self,
+        method: str,
+        *args,
+        nodes: Optional[Iterable[str]] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> FleetResult:
+        """
+        Run client.<method>(*args, **kwargs) on every node concurrently
+        :param method: client method name, e.g. transfer_info
+        :param nodes: Restrict the call to these nodes
+        :param deadline: Override the per-node deadline in seconds
+        :return:
+        """
+        nodes = list(self.clients) if nodes is None else list(nodes)
+        return await self.gather(
+            {
+                node: getattr(self.clients[node], method)(*args, **kwargs)
+                for node in nodes
+            },
+            deadline,
+        )
+
+    async def gather(self, calls: Dict[str, Any], deadline: Optional[float] = None):
+        """
+        Await one coroutine per node under the per-node deadline
+        :param calls: node name -> coroutine
+        :param deadline: Override the per-node deadline in seconds
+        :return:
+        """
+        deadline = self.deadline if deadline is None else deadline
+        result = FleetResult()
+        if not calls:
+            return result
+        tasks = {asyncio.ensure_future(coro): node for node, coro in calls.items()}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+            result.errors[tasks[task]] = asyncio.TimeoutError(
+                "no reply within {}s".format(deadline)
+            )
+        for task in done:
+            node = tasks[task]
+            if task.cancelled():
+                result.errors[node] = asyncio.CancelledError()
+            elif task.exception() is not None:
+                result.errors[node] = task.exception()
+            else:
+                result.results[node] = task.result()
+        return result
+
+    async def torrents_info(self, **kwargs) -> FleetResult:
+        """
+        torrents_info on every node, use merged() for one node-tagged list
+        :param kwargs: see QbittorrentClient.torrents_info
+        :return:
+        """
+        result = await self.call("torrents_info", **kwargs)
+        for node, torrents in result.results.items():
+            for torrent in torrents:
+                self.owners[torrent["hash"]] = node
+        return result
+
+    async def transfer_info(self) -> FleetResult:
+        return await self.call("transfer_info")
+
+    async def sync_maindata(self) -> FleetResult:
+        """
+        Update the per-node main data mirrors, results are the raw deltas
+        :return:
+        """
+        result = await self.gather(
+            {node: mirror.update() for node, mirror in self.mirrors.items()}, None
+        )
+        owners = self.owners
+        for node, delta in result.results.items():
+            if delta.get("full_update"):
+                for hash in [h for h, n in owners.items() if n == node]:
+                    del owners[hash]
+            for hash in delta.get("torrents", ()):
+                owners[hash] = node
+            for hash in delta.get("torrents_removed", ()):
+                if owners.get(hash) == node:
+                    del owners[hash]
+        return result
+
+    async def locate(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """
+        Find the owning node of every hash, asking the nodes for unknown ones
+        :param hashes:
+        :return: hash -> node for every hash found
+        """
+        hashes = list(hashes)
+        unknown = [h for h in hashes if h not in self.owners]
+        if unknown:
+            await self.torrents_info(hashes=unknown)
+        return {h: self.owners[h] for h in hashes if h in self.owners}
+
+    async def route(
+        self,
+        method: str,
+        hashes: Union[str, Iterable[str]],
+        *args,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> FleetResult:
+        """
+        Send a per-hash operation only to the nodes owning the hashes, e.g.
+        await fleet.route("torrents_pause", hashes)
+        Each node receives its own subset as the first argument. Hashes no
+        node knows are reported under the "unknown" error key.
+        :param method: client method name taking hashes first
+        :param hashes: one hash, a | separated string or a list
+        :return:
+        """
+        if isinstance(hashes, str):
+            hashes = hashes.split("|")
+        else:
+            hashes = list(hashes)  # walked again below, a generator would be spent
+        owners = await self.locate(hashes)
+        groups: Dict[str, List[str]] = {}
+        for hash in hashes:
+            node = owners.get(hash)
+            if node is not None:
+                groups.setdefault(node, []).append(hash)
+        result = await self.gather(
+            {
+                node: getattr(self.clients[node], method)(group, *args, **kwargs)
+                for node, group in groups.items()
+            },
+            deadline,
+        )
+        missing = [h for h in hashes if h not in owners]
+        if missing:
+            result.errors["unknown"] = HashNotFoundException("|".join(missing))
+        return result
+
+    async def close(self):
+        await asyncio.gather(
+            *(client.__aexit__(None, None, None) for client in self.clients.values()),
+            return_exceptions=True,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
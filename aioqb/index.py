@@ -0,0 +1,144 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from aioqb.sync import MainDataMirror, MirrorListener
+
+
+def _single(value) -> Tuple[str, ...]:
+    return (value,)
+
+
+def _tags(value: str) -> Tuple[str, ...]:
+    # qbittorrent joins tags with ", "
+    return tuple(t.strip() for t in value.split(",") if t.strip()) if value else ()
+
+
+def _tracker_host(value: str) -> Tuple[str, ...]:
+    if not value:
+        return ()
+    return (urlparse(value).hostname or value,)
+
+
+# index name -> (torrent field, function returning the index keys of a value)
+INDEXED_FIELDS: Dict[str, Tuple[str, Callable[..., Tuple[str, ...]]]] = {
+    "state": ("state", _single),
+    "category": ("category", _single),
+    "tag": ("tags", _tags),
+    "tracker": ("tracker", _tracker_host),
+    "save_path": ("save_path", _single),
+}
+
+
+class TorrentIndex(MirrorListener):
+    """
+    Secondary indexes over the torrents of a MainDataMirror, kept up to date
+    on every delta: state, category, tag, tracker host and save path to hashes
+    """
+
+    def __init__(self, mirror: MainDataMirror):
+        self.mirror = mirror
+        self.indexes: Dict[str, Dict[str, Set[str]]] = {
+            name: {} for name in INDEXED_FIELDS
+        }
+        for hash, torrent in mirror.torrents.items():
+            self.torrent_updated(hash, None, torrent)
+        mirror.add_listener(self)
+
+    def close(self):
+        """
+        Stop following the mirror
+        :return:
+        """
+        self.mirror.remove_listener(self)
+
+    def _add(self, index: Dict[str, Set[str]], keys: Iterable[str], hash: str):
+        for key in keys:
+            hashes = index.get(key)
+            if hashes is None:
+                index[key] = {hash}
+            else:
+                hashes.add(hash)
+
+    def _discard(self, index: Dict[str, Set[str]], keys: Iterable[str], hash: str):
+        for key in keys:
+            hashes = index.get(key)
+            if hashes is not None:
+                hashes.discard(hash)
+                if not hashes:
+                    del index[key]
+
+    def torrent_updated(self, hash: str, torrent: Optional[dict], partial: dict):
+        for name, (field, keys_of) in INDEXED_FIELDS.items():
+            if field not in partial:
+                continue
+            value = partial[field]
+            index = self.indexes[name]
+            if torrent is not None and field in torrent:
+                old = torrent[field]
+                if old == value:
+                    continue
+                self._discard(index, keys_of(old), hash)
+            self._add(index, keys_of(value), hash)
+
+    def torrent_removed(self, hash: str, torrent: dict):
+        for name, (field, keys_of) in INDEXED_FIELDS.items():
+            if field in torrent:
+                self._discard(self.indexes[name], keys_of(torrent[field]), hash)
+
+    def mirror_cleared(self):
+        for index in self.indexes.values():
+            index.clear()
+
+    def lookup(self, name: str, key: str) -> Set[str]:
+        """
+        Hashes whose indexed field matches key
+        :param name: One of state, category, tag, tracker, save_path
+        :param key: The value to look up
+        :return: a new set, safe to modify
+        """
+        return set(self.indexes[name].get(key, ()))
+
+    def keys(self, name: str) -> Set[str]:
+        """
+        Every distinct value currently present in an index
+        :param name: One of state, category, tag, tracker, save_path
+        :return:
+        """
+        return set(self.indexes[name])
+
+    def by_state(self, state: str) -> Set[str]:
+        return self.lookup("state", state)
+
+    def by_category(self, category: str) -> Set[str]:
+        return self.lookup("category", category)
+
+    def by_tag(self, tag: str) -> Set[str]:
+        return self.lookup("tag", tag)
+
+    def by_tracker(self, host: str) -> Set[str]:
+        return self.lookup("tracker", host)
+
+    def by_save_path(self, save_path: str) -> Set[str]:
+        return self.lookup("save_path", save_path)
+
+    def select(self, **criteria: str) -> Set[str]:
+        """
+        Hashes matching every criterion, e.g. select(state="stalledDL", category="x")
+        :param criteria: index name -> key
+        :return:
+        """
+        if not criteria:
+            return set(self.mirror.torrents)
+        sets = sorted(
+            (self.indexes[name].get(key, set()) for name, key in criteria.items()),
+            key=len,
+        )
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result.intersection_update(other)
+        return result
@@ -0,0 +1,144 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+import math
+from collections import deque
+from typing import Deque, Optional
+
+from typing_extensions import Literal
+
+LimiterMode = Literal["fixed", "aimd", "gradient"]
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of requests in flight against one WebUI. In fixed mode
+    the limit never changes, aimd grows it by one per window of healthy
+    replies and cuts it by backoff_ratio when latency exceeds
+    latency_threshold or a request fails, gradient scales it by the ratio
+    of the best seen latency to the current one.
+    """
+
+    def __init__(
+        self,
+        limit: int = 8,
+        mode: LimiterMode = "fixed",
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_threshold: float = 1.0,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        """
+        :param limit: Initial (in fixed mode the only) number of requests allowed in flight
+        :param mode: fixed, aimd or gradient
+        :param min_limit: Lower bound of the adaptive limit
+        :param max_limit: Upper bound of the adaptive limit
+        :param latency_threshold: aimd: seconds above which a reply counts as slow
+        :param backoff_ratio: aimd: factor applied to the limit after a slow reply or failure
+        :param tolerance: gradient: how many times the best latency is still considered healthy
+        :param smoothing: gradient: weight of a new sample in the limit and latency averages
+        """
+        if mode not in ("fixed", "aimd", "gradient"):
+            raise ValueError("mode must be one of fixed, aimd, gradient")
+        self.mode = mode
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._limit = float(limit)
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self.latency: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()  # granted right before the cancel
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, failed: bool = False):
+        """
+        :param latency: seconds the request took, None skips adaptation
+        :param failed: the request failed at the transport level
+        :return:
+        """
+        try:
+            if self.mode != "fixed" and (latency is not None or failed):
+                self._adapt(latency, failed)
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        waiters = self._waiters
+        while waiters and self.in_flight < self.limit:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adapt(self, latency: Optional[float], failed: bool):
+        if latency is not None:
+            if self.min_latency is None or latency < self.min_latency:
+                self.min_latency = latency
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += (latency - self.latency) * self.smoothing
+        if self.mode == "aimd":
+            if failed or latency > self.latency_threshold:
+                limit = self._limit * self.backoff_ratio
+            else:
+                limit = self._limit + 1 / self._limit
+        else:
+            if failed:
+                limit = self._limit * 0.5
+            else:
+                if self.latency <= 0:  # below the clock resolution, nothing is queued
+                    gradient = 1.0
+                else:
+                    gradient = max(
+                        0.5, min(1.0, self.tolerance * self.min_latency / self.latency)
+                    )
+                target = self._limit * gradient + math.sqrt(self._limit)
+                limit = self._limit + (target - self._limit) * self.smoothing
+        self._limit = min(float(self.max_limit), max(float(self.min_limit), limit))
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "latency": self.latency,
+            "min_latency": self.min_latency,
+        }
@@ -0,0 +1,68 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import base64
+import binascii
+import re
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl
+
+_HEX40 = re.compile(r"[0-9a-fA-F]{40}")
+_BASE32 = re.compile(r"[a-zA-Z2-7]{32}")
+_SHA256_MULTIHASH = re.compile(r"1220([0-9a-fA-F]{64})")
+
+
+def normalize_btih(btih: str) -> Optional[str]:
+    """
+    :param btih: 40 hex digits or 32 base32 characters
+    :return: lower case hex, None if btih is neither
+    """
+    if _HEX40.fullmatch(btih):
+        return btih.lower()
+    if _BASE32.fullmatch(btih):
+        try:
+            return binascii.hexlify(base64.b32decode(btih.upper())).decode()
+        except binascii.Error:
+            return None
+    return None
+
+
+def magnet_hash(url: str) -> Optional[str]:
+    """
+    The hash the WebUI will know a magnet link by: its btih, or for v2 only
+    links the SHA-256 btmh truncated to 40 characters
+    :param url:
+    :return: lower case hex, None for other URLs and magnets without a usable hash
+    """
+    if not url[:8].lower().startswith("magnet:?"):
+        return None
+    v2 = None
+    for key, value in parse_qsl(url[8:]):
+        if not key.startswith("xt"):  # xt, xt.1, xt.2 ...
+            continue
+        urn = value.lower()
+        if urn.startswith("urn:btih:"):
+            btih = normalize_btih(value[9:])
+            if btih is not None:
+                return btih
+        elif urn.startswith("urn:btmh:"):
+            m = _SHA256_MULTIHASH.fullmatch(value[9:])
+            if m is not None:
+                v2 = m.group(1).lower()[:40]
+    return v2
+
+
+def dedupe_urls(urls: Iterable[str]) -> List[str]:
+    """
+    Drop repeated URLs, magnet links count as repeated when their hash is
+    :param urls:
+    :return: the first occurrence of every URL, in order
+    """
+    seen = set()
+    unique = []
+    for url in urls:
+        key = magnet_hash(url) or url
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
@@ -0,0 +1,272 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import hashlib
+from bisect import bisect
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from aioqb.bencode import read_metainfo
+from aioqb.fleet import FleetClient, FleetResult
+from aioqb.magnet import magnet_hash
+from aioqb.sync import MainDataMirror, is_active
+
+QUEUED_STATES = frozenset(("queuedDL", "queuedUP"))
+
+# signal -> weight, a higher score means a busier node
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "active": 1.0,
+    "throughput": 1.0,
+    "queued": 0.5,
+    "free_space": 1.0,
+}
+
+
+def default_key(item) -> Optional[str]:
+    """
+    Placement key of one item passed to Placement.add, items with the same
+    key land on the same node. Torrent files and magnet links are keyed by
+    their info-hash, other URLs by themselves.
+    :param item: a url or a torrent file
+    :return:
+    """
+    if isinstance(item, str) and (item.startswith("magnet:") or "://" in item):
+        return magnet_hash(item) or item
+    try:
+        return read_metainfo(item).hash
+    except (ValueError, OSError):
+        return None
+
+
+class NodeLoad:
+    """
+    Load signals of one node taken from its main data mirror
+    """
+
+    __slots__ = ("node", "free_space", "active", "throughput", "queued", "pending")
+
+    def __init__(self, node: str, mirror: MainDataMirror):
+        state = mirror.server_state
+        self.node = node
+        self.free_space: int = state.get("free_space_on_disk", 0)
+        self.throughput: int = state.get("dl_info_speed", 0) + state.get(
+            "up_info_speed", 0
+        )
+        self.active = 0
+        self.queued = 0
+        for torrent in mirror.torrents.values():
+            if torrent.get("state") in QUEUED_STATES:
+                self.queued += 1
+            elif is_active(torrent):
+                self.active += 1
+        self.pending = 0  # placed by us but not yet visible in the mirror
+
+    def __repr__(self):
+        return (
+            "NodeLoad({}, free_space={}, active={}, throughput={}, queued={})".format(
+                self.node, self.free_space, self.active, self.throughput, self.queued
+            )
+        )
+
+
+class HashRing:
+    """
+    Consistent hash ring, adding or removing a node only moves the keys
+    which belong to that node
+    """
+
+    def __init__(self, nodes, replicas: int = 64):
+        """
+        :param nodes: node names
+        :param replicas: Virtual points per node, more points spread keys more evenly
+        """
+        points = []
+        for node in nodes:
+            for i in range(replicas):
+                points.append((self._hash("{}#{}".format(node, i)), node))
+        points.sort()
+        self._points = [p for p, _ in points]
+        self._nodes = [n for _, n in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def preference(self, key: str) -> Iterator[str]:
+        """
+        Nodes in the order they should take the key, the owner first
+        :param key:
+        :return:
+        """
+        if not self._points:
+            return
+        start = bisect(self._points, self._hash(key))
+        seen = set()
+        count = len(self._nodes)
+        for i in range(count):
+            node = self._nodes[(start + i) % count]
+            if node not in seen:
+                seen.add(node)
+                yield node
+
+    def get(self, key: str) -> Optional[str]:
+        return next(self.preference(key), None)
+
+
+class Placement:
+    """
+    Picks the node for new torrents from live load: free disk space, active
+    and queued torrents and current throughput, the least busy eligible node
+    wins. A re-add whose info-hash a node already holds goes back to that
+    node. With consistent=True keyed items follow a bounded-load hash ring
+    instead: the first node on the ring takes the key unless it is down,
+    short of disk space or busier than the mean by more than load_slack.
+    """
+
+    def __init__(
+        self,
+        fleet: FleetClient,
+        min_free_space: int = 0,
+        weights: Optional[Dict[str, float]] = None,
+        consistent: bool = False,
+        replicas: int = 64,
+        load_slack: float = 0.25,
+    ):
+        """
+        :param fleet:
+        :param min_free_space: Nodes with less free bytes on disk take nothing
+        :param weights: signal -> weight, see DEFAULT_WEIGHTS
+        :param consistent: Place keyed items on the bounded-load hash ring instead of by load alone
+        :param replicas: Virtual points per node on the hash ring
+        :param load_slack: How far above the mean score a ring node may be and still take its keys
+        """
+        self.fleet = fleet
+        self.min_free_space = min_free_space
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.consistent = consistent
+        self.ring = HashRing(fleet.clients, replicas)
+        self.load_slack = load_slack
+        self.loads: Dict[str, NodeLoad] = {}
+
+    async def refresh(self) -> FleetResult:
+        """
+        Sync every node and recompute its load, nodes which did not answer
+        are left out of placement until the next refresh
+        :return:
+        """
+        result = await self.fleet.sync_maindata()
+        self.loads = {
+            node: NodeLoad(node, self.fleet.mirrors[node]) for node in result.results
+        }
+        return result
+
+    def eligible(self, node: str) -> bool:
+        load = self.loads.get(node)
+        return load is not None and load.free_space >= self.min_free_space
+
+    def maxima(self) -> Dict[str, float]:
+        """
+        Largest value of every signal across the nodes, what score divides by
+        :return:
+        """
+        loads = self.loads.values()
+        return {
+            "active": max(l.active + l.pending for l in loads),
+            "throughput": max(l.throughput for l in loads),
+            "queued": max(l.queued for l in loads),
+            "free_space": max(l.free_space for l in loads),
+        }
+
+    def score(self, load: NodeLoad, maxima: Optional[Dict[str, float]] = None) -> float:
+        """
+        Busyness of a node relative to the busiest one, lower is better
+        :param load:
+        :param maxima: see maxima, pass it in when scoring several nodes at once
+        :return:
+        """
+        if maxima is None:
+            maxima = self.maxima()
+        weights = self.weights
+        score = 0.0
+        for signal in ("active", "throughput", "queued"):
+            value = getattr(load, signal)
+            if signal == "active":
+                value += load.pending
+            top = maxima[signal]
+            if top:
+                score += weights.get(signal, 0.0) * value / top
+        top = maxima["free_space"]
+        if top:
+            score -= weights.get("free_space", 0.0) * load.free_space / top
+        return score
+
+    def choose(self, key: Optional[str] = None) -> str:
+        """
+        Pick the node for one item and count it as pending there
+        :param key: info-hash or other stable key, re-adds go back to the node holding it
+        :raise RuntimeError: when no node is eligible, call refresh first
+        :return: node name
+        """
+        candidates = [l for n, l in self.loads.items() if self.eligible(n)]
+        if not candidates:
+            raise RuntimeError("no node is eligible for placement")
+        node = None
+        scores = None
+        if key is not None:
+            owner = self.fleet.owners.get(key)  # a re-add
+            if owner is not None and self.eligible(owner):
+                node = owner
+            elif self.consistent:
+                maxima = self.maxima()
+                scores = {l.node: self.score(l, maxima) for l in candidates}
+                bound = sum(scores.values()) / len(scores) + self.load_slack
+                node = next(
+                    (
+                        n
+                        for n in self.ring.preference(key)
+                        if n in scores and scores[n] <= bound
+                    ),
+                    None,
+                )
+        if node is None:
+            if scores is None:
+                maxima = self.maxima()
+                scores = {l.node: self.score(l, maxima) for l in candidates}
+            node = min(scores, key=scores.__getitem__)
+        self.loads[node].pending += 1
+        return node
+
+    async def add(
+        self,
+        urls: Optional[List[str]] = None,
+        torrents: Optional[List[Any]] = None,
+        key: Callable[[Any], Optional[str]] = default_key,
+        refresh: bool = True,
+        **kwargs,
+    ) -> FleetResult:
+        """
+        Place every url and torrent file, then send each node one torrents_add
+        :param urls: see QbittorrentClient.torrents_add
+        :param torrents: see QbittorrentClient.torrents_add
+        :param key: item -> placement key, see default_key
+        :param refresh: Sync the fleet before placing
+        :param kwargs: Passed to every torrents_add, e.g. category
+        :return: FleetResult, results hold {"urls": [...], "torrents": [...], "reply": ...} per node
+        """
+        if refresh or not self.loads:
+            await self.refresh()
+        batches: Dict[str, Dict[str, list]] = {}
+        for field, items in (("urls", urls), ("torrents", torrents)):
+            for item in items or ():
+                node = self.choose(key(item))
+                batch = batches.setdefault(node, {"urls": [], "torrents": []})
+                batch[field].append(item)
+
+        async def send(node: str, batch: Dict[str, list]):
+            reply = await self.fleet.clients[node].torrents_add(
+                urls=batch["urls"] or None, torrents=batch["torrents"] or None, **kwargs
+            )
+            return dict(batch, reply=reply)
+
+        return await self.fleet.gather(
+            {node: send(node, batch) for node, batch in batches.items()}, None
+        )
@@ -0,0 +1,126 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+import random
+import time
+from typing import Tuple, Type
+
+import aiohttp
+
+from aioqb.endpoints import IDEMPOTENT_ENDPOINTS, READ_ENDPOINTS
+from aioqb.exceptions import CircuitOpenException
+
+# transport level failures, HTTP error replies are never retried
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    aiohttp.ClientConnectionError,
+    aiohttp.ClientPayloadError,
+    asyncio.TimeoutError,
+)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for endpoints which are safe to send again
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        retry_writes: bool = True,
+        retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS,
+    ):
+        """
+        :param attempts: Max number of tries, including the first one
+        :param base_delay: Delay ceiling in seconds after the first failure, doubled for every further one
+        :param max_delay: Upper bound of the delay ceiling
+        :param retry_writes: Also retry idempotent writes, reads are always retried
+        :param retry_on: Exception types considered transient
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_writes = retry_writes
+        self.retry_on = retry_on
+
+    def retryable(self, name: str) -> bool:
+        """
+        :param name: endpoint name, e.g. torrents/info
+        :return:
+        """
+        endpoints = IDEMPOTENT_ENDPOINTS if self.retry_writes else READ_ENDPOINTS
+        return name in endpoints
+
+    def delay(self, attempt: int) -> float:
+        """
+        :param attempt: number of failed tries so far, starting at 1
+        :return: seconds to wait before the next try
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a WebUI is unresponsive. After failure_threshold
+    consecutive transport failures the circuit opens and requests raise
+    CircuitOpenException without being sent; after recovery_timeout one
+    trial request is let through and its outcome closes or reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self.opened_at >= self.recovery_timeout
+        ):
+            return self.HALF_OPEN
+        return self._state
+
+    def before_request(self):
+        """
+        :raise CircuitOpenException: when the request must not be sent
+        :return:
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return
+        if state == self.HALF_OPEN and not self._trial:
+            self._trial = True
+            return
+        raise CircuitOpenException(
+            "circuit open after {} consecutive failures".format(self.failures)
+        )
+
+    def record_success(self):
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial = False
+
+    def release(self):
+        """
+        The request ended without telling anything about the server, e.g. it was cancelled
+        :return:
+        """
+        self._trial = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._trial = False
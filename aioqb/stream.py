@@ -0,0 +1,88 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import re
+from typing import List, Optional
+
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+_IN_STRING = re.compile(rb'[\\"]')
+
+
+class JsonArrayParser:
+    """
+    Incremental splitter for a top level JSON array. Bytes are fed as they
+    arrive and every complete element is returned as its own bytes object,
+    so only the unfinished element is ever buffered.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.pos = 0  # where scanning resumes
+        self.depth = 0
+        self.in_string = False
+        self.start: Optional[int] = None  # beginning of the current element
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        :param chunk: The next piece of the body
+        :return: raw JSON of every element completed by this chunk
+        """
+        buffer = self.buffer
+        buffer.extend(chunk)
+        elements = []
+        pos = self.pos
+        depth = self.depth
+        in_string = self.in_string
+        start = self.start
+        while not self.done:
+            if in_string:
+                m = _IN_STRING.search(buffer, pos)
+                if m is None:
+                    pos = len(buffer)
+                    break
+                if buffer[m.start()] == 0x5C:  # backslash, skip the escaped byte
+                    if m.end() >= len(buffer):
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                in_string = False
+                pos = m.end()
+                continue
+            m = _STRUCTURAL.search(buffer, pos)
+            if m is None:
+                pos = len(buffer)
+                break
+            char = buffer[m.start()]
+            pos = m.end()
+            if char == 0x22:  # "
+                in_string = True
+            elif char == 0x5B or char == 0x7B:  # [ {
+                depth += 1
+                if depth == 1:
+                    if char != 0x5B:
+                        raise ValueError("expected a JSON array")
+                    start = pos
+            elif char == 0x5D or char == 0x7D:  # ] }
+                depth -= 1
+                if depth == 0:
+                    element = bytes(buffer[start : m.start()]).strip()
+                    if element:
+                        elements.append(element)
+                    self.done = True
+            elif depth == 1:  # , between two elements
+                elements.append(bytes(buffer[start : m.start()]).strip())
+                start = pos
+        # drop everything before the unfinished element
+        consumed = start if start is not None and not self.done else pos
+        if consumed:
+            del buffer[:consumed]
+            pos -= consumed
+            if start is not None:
+                start -= consumed
+        self.pos = pos
+        self.depth = depth
+        self.in_string = in_string
+        self.start = start
+        return elements
@@ -0,0 +1,281 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from aioqb.exceptions import HashNotFoundException
+
+if TYPE_CHECKING:
+    from aioqb.client import _BaseQbittorrentClient
+
+# torrent states in which peers come and go
+ACTIVE_STATES = frozenset(
+    (
+        "downloading",
+        "forcedDL",
+        "metaDL",
+        "forcedMetaDL",
+        "uploading",
+        "forcedUP",
+        "stalledDL",
+        "stalledUP",
+    )
+)
+
+
+def is_active(torrent: dict) -> bool:
+    """
+    Whether a mirrored torrent is worth polling peers for
+    :param torrent: torrent dict from the main data mirror
+    :return:
+    """
+    return (
+        torrent.get("dlspeed", 0) > 0
+        or torrent.get("upspeed", 0) > 0
+        or (
+            torrent.get("state") in ACTIVE_STATES
+            and torrent.get("num_leechs", 0) + torrent.get("num_seeds", 0) > 0
+        )
+    )
+
+
+class MirrorListener:
+    """
+    Receives torrent changes from a MainDataMirror, subclass and override
+    the methods you need
+    """
+
+    def torrent_updated(self, hash: str, torrent: Optional[dict], partial: dict):
+        """
+        Called before partial is merged into the mirror
+        :param hash: The hash of the torrent
+        :param torrent: The mirrored torrent, None if the torrent is new
+        :param partial: The changed fields sent by the server
+        :return:
+        """
+
+    def torrent_removed(self, hash: str, torrent: dict):
+        """
+        Called after a torrent left the mirror
+        :param hash: The hash of the torrent
+        :param torrent: The last mirrored state of the torrent
+        :return:
+        """
+
+    def mirror_cleared(self):
+        """
+        Called after MainDataMirror.clear dropped everything
+        :return:
+        """
+
+
+class MainDataMirror:
+    """
+    Local in-memory copy of /sync/maindata which only pulls deltas.
+    The mirror owns the rid cursor, merges partial torrent dicts and
+    honours full_update resets and the *_removed lists.
+    """
+
+    def __init__(self, client: Optional["_BaseQbittorrentClient"] = None):
+        self.client = client
+        self.rid = 0
+        self.torrents: Dict[str, dict] = {}
+        self.categories: Dict[str, dict] = {}
+        self.tags: Set[str] = set()
+        self.trackers: Dict[str, List[str]] = {}
+        self.server_state: dict = {}
+        self.listeners: List[MirrorListener] = []
+
+    def add_listener(self, listener: "MirrorListener"):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: "MirrorListener"):
+        self.listeners.remove(listener)
+
+    def clear(self):
+        """
+        Drop all mirrored state, the next update will be a full one
+        :return:
+        """
+        self.rid = 0
+        self.torrents.clear()
+        self.categories.clear()
+        self.tags.clear()
+        self.trackers.clear()
+        self.server_state.clear()
+        for listener in self.listeners:
+            listener.mirror_cleared()
+
+    def apply(self, data: dict) -> dict:
+        """
+        Merge one /sync/maindata reply into the mirror
+        :param data: The decoded server reply
+        :return: the reply itself
+        """
+        full_update = data.get("full_update", False)
+        torrents = self.torrents
+        updated = data.get("torrents", {})
+        if full_update:
+            # a full update replaces torrents instead of clearing them, so
+            # listeners see what actually changed
+            removed = [hash for hash in torrents if hash not in updated]
+            self.categories.clear()
+            self.tags.clear()
+            self.trackers.clear()
+            self.server_state.clear()
+        else:
+            removed = data.get("torrents_removed", ())
+
+        listeners = self.listeners
+        for hash, partial in updated.items():
+            torrent = torrents.get(hash)
+            for listener in listeners:
+                listener.torrent_updated(hash, torrent, partial)
+            if torrent is None or full_update:
+                torrents[hash] = dict(partial)
+            else:
+                torrent.update(partial)
+        for hash in removed:
+            torrent = torrents.pop(hash, None)
+            if torrent is not None:
+                for listener in listeners:
+                    listener.torrent_removed(hash, torrent)
+
+        categories = self.categories
+        for name, partial in data.get("categories", {}).items():
+            category = categories.get(name)
+            if category is None:
+                categories[name] = dict(partial)
+            else:
+                category.update(partial)
+        for name in data.get("categories_removed", ()):
+            categories.pop(name, None)
+
+        self.tags.update(data.get("tags", ()))
+        self.tags.difference_update(data.get("tags_removed", ()))
+
+        self.trackers.update(data.get("trackers", {}))
+        for url in data.get("trackers_removed", ()):
+            self.trackers.pop(url, None)
+
+        self.server_state.update(data.get("server_state", {}))
+        self.rid = data.get("rid", self.rid)
+        return data
+
+    async def update(self) -> dict:
+        """
+        Fetch the delta since the last known rid and apply it
+        :return: the raw delta returned by the server
+        """
+        data = await self.client.sync_maindata(self.rid)
+        return self.apply(data)
+
+    def __len__(self):
+        return len(self.torrents)
+
+    def __contains__(self, hash: str):
+        return hash in self.torrents
+
+    def __getitem__(self, hash: str) -> dict:
+        return self.torrents[hash]
+
+
+class PeerMirror:
+    """
+    Local copy of /sync/torrentPeers for many torrents. A rid is kept per
+    torrent hash, so every poll only transfers the peers which changed.
+    """
+
+    def __init__(
+        self,
+        client: Optional["_BaseQbittorrentClient"] = None,
+        maindata: Optional[MainDataMirror] = None,
+        concurrency: int = 8,
+    ):
+        self.client = client
+        self.maindata = maindata
+        self.concurrency = concurrency
+        self.rids: Dict[str, int] = {}
+        self.peers: Dict[str, Dict[str, dict]] = {}
+
+    def forget(self, hash: str):
+        """
+        Stop tracking a torrent, a later poll starts with a full update again
+        :param hash:
+        :return:
+        """
+        self.rids.pop(hash, None)
+        self.peers.pop(hash, None)
+
+    def apply(self, hash: str, data: dict) -> dict:
+        """
+        Merge one /sync/torrentPeers reply into the peer table of a torrent
+        :param hash: The hash of the torrent the reply belongs to
+        :param data: The decoded server reply
+        :return: the reply itself
+        """
+        table = self.peers.get(hash)
+        if table is None:
+            table = self.peers[hash] = {}
+        elif data.get("full_update"):
+            table.clear()
+        for key, partial in data.get("peers", {}).items():
+            peer = table.get(key)
+            if peer is None:
+                table[key] = dict(partial)
+            else:
+                peer.update(partial)
+        for key in data.get("peers_removed", ()):
+            table.pop(key, None)
+        self.rids[hash] = data.get("rid", self.rids.get(hash, 0))
+        return data
+
+    def active_hashes(self) -> List[str]:
+        """
+        Hashes of mirrored torrents which are active according to main data
+        :return:
+        """
+        return [h for h, t in self.maindata.torrents.items() if is_active(t)]
+
+    async def update_one(self, hash: str) -> dict:
+        data = await self.client.sync_torrentPeers(hash, self.rids.get(hash, 0))
+        return self.apply(hash, data)
+
+    async def update(self, hashes: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """
+        Poll the peers of the given torrents, or of every active torrent in
+        the main data mirror when hashes is None
+        :param hashes: torrent hashes to poll
+        :return: hash -> delta for every torrent which was polled, torrents deleted
+        in the meantime are forgotten and left out
+        """
+        if hashes is None:
+            if self.maindata is None:
+                raise ValueError("hashes is required without a main data mirror")
+            hashes = self.active_hashes()
+            for hash in [h for h in self.peers if h not in self.maindata.torrents]:
+                self.forget(hash)
+        hashes = list(hashes)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def poll(hash: str) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await self.update_one(hash)
+                except HashNotFoundException:
+                    # deleted since main data listed it
+                    self.forget(hash)
+                    return None
+
+        deltas = await asyncio.gather(*(poll(h) for h in hashes))
+        return {h: d for h, d in zip(hashes, deltas) if d is not None}
+
+    def __len__(self):
+        return len(self.peers)
+
+    def __contains__(self, hash: str):
+        return hash in self.peers
+
+    def __getitem__(self, hash: str) -> Dict[str, dict]:
+        return self.peers[hash]
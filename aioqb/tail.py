@@ -0,0 +1,61 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional
+
+from aioqb.utils import DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL, AdaptiveInterval
+
+
+class LogTailer:
+    """
+    Follows log/main or log/peers. last_known_id is tracked internally, so
+    every poll only returns new entries; store it to resume after a restart
+    without duplicates.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[List[dict]]],
+        last_known_id: int = -1,
+        buffer_size: Optional[int] = None,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        factor: float = 2.0,
+        jitter: float = 0.1,
+    ):
+        """
+        :param fetch: Coroutine function taking last_known_id and returning log entries
+        :param last_known_id: Resume after this message id, -1 starts from the beginning
+        :param buffer_size: Keep the last buffer_size entries in self.buffer
+        :param min_interval: Poll interval in seconds while new entries arrive
+        :param max_interval: Upper bound of the poll interval while idle
+        :param factor: Growth factor of the interval for every idle poll
+        :param jitter: Random fraction added to or subtracted from every interval
+        """
+        self.fetch = fetch
+        self.last_known_id = last_known_id
+        self.buffer: Optional[Deque[dict]] = (
+            deque(maxlen=buffer_size) if buffer_size else None
+        )
+        self.interval = AdaptiveInterval(min_interval, max_interval, factor, jitter)
+
+    async def poll(self) -> List[dict]:
+        """
+        Fetch the entries newer than last_known_id once
+        :return:
+        """
+        entries = await self.fetch(self.last_known_id)
+        if entries:
+            self.last_known_id = max(self.last_known_id, entries[-1]["id"])
+            if self.buffer is not None:
+                self.buffer.extend(entries)
+        return entries
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        while True:
+            entries = await self.poll()
+            for entry in entries:
+                yield entry
+            await asyncio.sleep(self.interval.feed(bool(entries)))
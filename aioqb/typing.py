@@ -1,7 +1,14 @@
 """
 Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
 """
-from typing import Callable
+import mmap
+import os
+from typing import Any, BinaryIO, Callable, Union
 
 JsonDumps = Callable[[dict], str]
-JsonLoads = Callable[[str], dict]
+# replies are decoded from the raw body, loads must accept bytes (json, orjson, ujson do)
+JsonLoads = Callable[[Union[str, bytes]], Any]
+# what torrents_add accepts as one .torrent file
+TorrentSource = Union[
+    BinaryIO, bytes, bytearray, memoryview, mmap.mmap, str, os.PathLike
+]
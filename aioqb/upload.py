@@ -0,0 +1,118 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import io
+import mmap
+import os
+from contextlib import ExitStack
+from typing import Iterable, List
+
+import aiohttp
+
+from aioqb.typing import TorrentSource
+
+TORRENT_CONTENT_TYPE = "application/x-bittorrent"
+
+
+class TorrentUpload:
+    """
+    One .torrent file of a torrents_add request. Buffers are sent as they
+    are without copying, paths are only opened while their request is sent
+    and file objects are streamed in chunks by aiohttp.
+    """
+
+    __slots__ = ("source", "filename", "size")
+
+    def __init__(self, source: TorrentSource, index: int = 0):
+        """
+        :param source: file object, bytes, bytearray, memoryview, mmap or path
+        :param index: Position in the batch, names buffers without a name
+        """
+        self.source = source
+        if isinstance(source, (str, os.PathLike)):
+            self.filename = os.path.basename(source)
+            self.size = os.path.getsize(source)
+        elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.filename = "{}.torrent".format(index)
+            self.size = source.nbytes if isinstance(source, memoryview) else len(source)
+        else:
+            self.filename = os.path.basename(
+                getattr(source, "name", None) or "{}.torrent".format(index)
+            )
+            self.size = self._remaining(source)
+
+    @staticmethod
+    def _remaining(file) -> int:
+        try:
+            pos = file.tell()
+            size = file.seek(0, io.SEEK_END) - pos
+            file.seek(pos)
+            return size
+        except (AttributeError, OSError):
+            return 0
+
+    def open(self, stack: ExitStack):
+        """
+        :param stack: closes the file opened for a path once the request is sent
+        :return: value for FormData.add_field
+        """
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            return stack.enter_context(open(source, "rb"))
+        if isinstance(source, mmap.mmap):
+            return stack.enter_context(memoryview(source))
+        return source
+
+    def __repr__(self):
+        return "TorrentUpload({!r}, size={})".format(self.filename, self.size)
+
+
+def prepare_uploads(torrents: Iterable[TorrentSource]) -> List[TorrentUpload]:
+    return [TorrentUpload(t, i) for i, t in enumerate(torrents)]
+
+
+def split_uploads(
+    uploads: List[TorrentUpload], max_size: int
+) -> List[List[TorrentUpload]]:
+    """
+    Group uploads into requests of at most max_size bytes of files,
+    a single file larger than that gets a request of its own
+    :param uploads:
+    :param max_size:
+    :return:
+    """
+    batches = []
+    batch: List[TorrentUpload] = []
+    size = 0
+    for upload in uploads:
+        if batch and size + upload.size > max_size:
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(upload)
+        size += upload.size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def build_form(
+    fields: dict, uploads: List[TorrentUpload], stack: ExitStack
+) -> aiohttp.FormData:
+    """
+    :param fields: encoded scalar fields of torrents_add
+    :param uploads: files of this request
+    :param stack: keeps the files opened for paths until the request is sent
+    :return:
+    """
+    data = aiohttp.FormData()
+    for name, value in fields.items():
+        data.add_field(name, value)
+    for upload in uploads:
+        data.add_field(
+            "torrents",
+            upload.open(stack),
+            content_type=TORRENT_CONTENT_TYPE,
+            filename=upload.filename,
+        )
+    return data
@@ -2,6 +2,7 @@
 Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
 """
 import json
+import random
 import sys
 
 DEFAULT_JSON_DECODER = json.loads
@@ -9,6 +10,20 @@ DEFAULT_JSON_ENCODER = json.dumps
 
 DEFAULT_HOST = "http://127.0.0.1"
 DEFAULT_TIMEOUT = 30.0
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# bulk torrents_add is split into requests of at most this many bytes of files,
+# well below the body size limit of the WebUI
+DEFAULT_MAX_UPLOAD_SIZE = 8 * 1024 * 1024
+DEFAULT_UPLOAD_CONCURRENCY = 2
+DEFAULT_MAX_URLS = 100  # per torrents_add request
+
+DEFAULT_CONNECTION_LIMIT = 100
+DEFAULT_CONNECTION_LIMIT_PER_HOST = 0  # unlimited
+DEFAULT_KEEPALIVE_TIMEOUT = 15.0
+DEFAULT_DNS_CACHE_TTL = 10
+
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 30.0
 
 
 class TagGen:
@@ -18,3 +33,48 @@ class TagGen:
     def __call__(self) -> int:
         self._id = (self._id + 1) % sys.maxsize
         return self._id
+
+
+class AdaptiveInterval:
+    """
+    Polling interval which stays at min_interval while something changes
+    and grows geometrically up to max_interval while idle
+    """
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        factor: float = 2.0,
+        jitter: float = 0.1,
+    ):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("require 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.current = min_interval
+
+    def reset(self):
+        self.current = self.min_interval
+
+    def backoff(self):
+        self.current = min(self.current * self.factor, self.max_interval)
+
+    def feed(self, active: bool) -> float:
+        """
+        Adjust the interval according to the last poll and return the delay
+        :param active: whether the last poll returned anything new
+        :return: seconds to sleep before the next poll
+        """
+        if active:
+            self.reset()
+        else:
+            self.backoff()
+        return self.delay()
+
+    def delay(self) -> float:
+        if not self.jitter:
+            return self.current
+        return max(0.0, self.current * (1 + random.uniform(-self.jitter, self.jitter)))
@@ -0,0 +1,184 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from typing_extensions import Literal
+
+from aioqb.exceptions import HashNotFoundException
+from aioqb.sync import MainDataMirror, MirrorListener
+from aioqb.utils import AdaptiveInterval
+
+if TYPE_CHECKING:
+    from aioqb.client import _BaseQbittorrentClient
+
+WaitUntil = Literal["present", "metadata", "completed"]
+
+# states of a magnet link whose metadata is still being fetched
+METADATA_STATES = frozenset(("metaDL", "forcedMetaDL"))
+
+DEFAULT_WAIT_MIN_INTERVAL = 0.5
+DEFAULT_WAIT_MAX_INTERVAL = 2.0
+
+
+def reached(torrent: dict, until: WaitUntil) -> bool:
+    """
+    :param torrent: torrent dict from the main data mirror
+    :param until: present, metadata or completed
+    :return:
+    """
+    if until == "present":
+        return True
+    if until == "metadata":
+        return (
+            torrent.get("state") not in METADATA_STATES
+            and torrent.get("total_size", 0) > 0
+        )
+    return torrent.get("progress", 0) >= 1
+
+
+class TorrentWaiter(MirrorListener):
+    """
+    Resolves waits for torrents to show up, get their metadata or complete
+    from main data deltas. However many torrents are awaited, one
+    sync_maindata poller feeds them all, and it only runs while someone
+    waits. With poll=False the waiter only listens to a mirror which is
+    updated elsewhere, e.g. by watch_maindata.
+    """
+
+    def __init__(
+        self,
+        client: Optional["_BaseQbittorrentClient"] = None,
+        mirror: Optional[MainDataMirror] = None,
+        poll: bool = True,
+        min_interval: float = DEFAULT_WAIT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_WAIT_MAX_INTERVAL,
+    ):
+        """
+        :param client:
+        :param mirror: Mirror to read torrents from, a private one is created when omitted
+        :param poll: Poll sync_maindata while waits are pending
+        :param min_interval: Poll interval in seconds while torrents change
+        :param max_interval: Upper bound of the poll interval while idle
+        """
+        self.mirror = MainDataMirror(client) if mirror is None else mirror
+        self.mirror.add_listener(self)
+        self.poll = poll
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._waiters: Dict[str, List[Tuple[WaitUntil, asyncio.Future]]] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        :return: number of torrents waited for
+        """
+        return len(self._waiters)
+
+    def torrent_updated(self, hash: str, torrent: Optional[dict], partial: dict):
+        waiters = self._waiters.get(hash)
+        if waiters:
+            merged = dict(torrent or {}, **partial)
+            self._resolve(hash, merged, waiters)
+
+    def torrent_removed(self, hash: str, torrent: dict):
+        for until, future in self._waiters.pop(hash, ()):
+            if not future.done():
+                future.set_exception(
+                    HashNotFoundException("{} was removed".format(hash))
+                )
+
+    def _resolve(self, hash: str, torrent: dict, waiters: list):
+        remaining = []
+        for until, future in waiters:
+            if future.done():
+                continue
+            if reached(torrent, until):
+                future.set_result(torrent)
+            else:
+                remaining.append((until, future))
+        if remaining:
+            self._waiters[hash] = remaining
+        else:
+            self._waiters.pop(hash, None)
+
+    async def wait(
+        self,
+        hashes: Union[str, Iterable[str]],
+        until: WaitUntil = "present",
+        timeout: Optional[float] = None,
+    ) -> Dict[str, dict]:
+        """
+        :param hashes: one hash, a | separated string or a list, repeats and empty entries are ignored
+        :param until: present, metadata or completed
+        :param timeout: Seconds to wait, None waits forever
+        :raise asyncio.TimeoutError: when a torrent did not get there in time
+        :raise HashNotFoundException: when a torrent was removed while waited for
+        :return: hash -> torrent dict at the moment it got there
+        """
+        if until not in ("present", "metadata", "completed"):
+            raise ValueError("until must be one of present, metadata, completed")
+        if isinstance(hashes, str):
+            hashes = hashes.split("|")
+        # a hash listed twice must not leave a second, never cancelled future behind
+        hashes = list(dict.fromkeys(h.lower() for h in hashes if h))
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for hash in hashes:
+            future = futures[hash] = loop.create_future()
+            waiters = self._waiters.setdefault(hash, [])
+            waiters.append((until, future))
+            torrent = self.mirror.torrents.get(hash)
+            if torrent is not None:
+                self._resolve(hash, torrent, waiters)
+        self._ensure_poller()
+        try:
+            await asyncio.wait_for(asyncio.gather(*futures.values()), timeout)
+        finally:
+            for future in futures.values():
+                future.cancel()  # no-op for the resolved ones
+            self._forget_cancelled()
+        return {hash: future.result() for hash, future in futures.items()}
+
+    def _forget_cancelled(self):
+        for hash in list(self._waiters):
+            waiters = [w for w in self._waiters[hash] if not w[1].done()]
+            if waiters:
+                self._waiters[hash] = waiters
+            else:
+                del self._waiters[hash]
+
+    def _ensure_poller(self):
+        if (
+            self.poll
+            and self._waiters
+            and (self._poller is None or self._poller.done())
+        ):
+            self._poller = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        interval = AdaptiveInterval(self.min_interval, self.max_interval)
+        try:
+            while self._waiters:
+                data = await self.mirror.update()
+                active = any(k not in ("rid", "full_update") for k in data)
+                if not self._waiters:
+                    break
+                await asyncio.sleep(interval.feed(active))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # a failed poll fails every pending wait instead of hanging it
+            for waiters in self._waiters.values():
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            self._waiters.clear()
+
+    async def close(self):
+        self.mirror.remove_listener(self)
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
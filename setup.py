@@ -39,8 +39,9 @@ def main():
         author="synodriver",
         author_email="diguohuangjiajinweijun@gmail.com",
         maintainer="v-vinson",
-        python_requires=">=3.6",
+        python_requires=">=3.7",
         install_requires=["aiohttp", "typing-extensions"],
+        extras_require={"numpy": ["numpy"]},
         license="GPLv3",
         classifiers=[
             "Development Status :: 3 - Alpha",
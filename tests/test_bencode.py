@@ -0,0 +1,124 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import hashlib
+import io
+
+import pytest
+
+from aioqb.bencode import TorrentMetainfo, decode, read_metainfo
+
+
+def bencode(value) -> bytes:
+    if isinstance(value, int):
+        return b"i%de" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"%d:%s" % (len(value), value)
+    if isinstance(value, list):
+        return b"l" + b"".join(bencode(v) for v in value) + b"e"
+    items = sorted(
+        (k.encode() if isinstance(k, str) else k, v) for k, v in value.items()
+    )
+    return b"d" + b"".join(bencode(k) + bencode(v) for k, v in items) + b"e"
+
+
+V1_INFO = {
+    "name": "album",
+    "piece length": 16384,
+    "pieces": bytes(range(20)) * 3,
+    "files": [
+        {"length": 1000, "path": ["a.flac"]},
+        {"length": 15384, "path": [".pad", "15384"], "attr": "p"},
+        {"length": 2000, "path": ["b.flac"]},
+    ],
+}
+
+V2_TREE = {
+    "a.flac": {"": {"length": 1000, "pieces root": b"\x01" * 32}},
+    "disc2": {"b.flac": {"": {"length": 2000, "pieces root": b"\x02" * 32}}},
+}
+
+
+def torrent(info: dict, **extra) -> bytes:
+    return bencode(dict({"announce": "http://tracker/announce", "info": info}, **extra))
+
+
+def test_decode():
+    assert decode(b"d3:fooli1ei-2ee3:bar0:e") == {b"foo": [1, -2], b"bar": b""}
+    with pytest.raises(ValueError):
+        decode(b"d3:foo")
+    with pytest.raises(ValueError):
+        decode(b"5:ab")
+
+
+def test_deeply_nested():
+    data = b"l" * 5000 + b"e" * 5000
+    with pytest.raises(ValueError):
+        decode(data)
+    with pytest.raises(ValueError):
+        TorrentMetainfo(b"d4:info" + data + b"e")
+
+
+def test_v1():
+    meta = TorrentMetainfo(torrent(V1_INFO, comment="x"))
+    assert meta.info_hash_v1 == hashlib.sha1(bencode(V1_INFO)).hexdigest()
+    assert meta.info_hash_v2 is None
+    assert meta.hash == meta.info_hash_v1
+    assert meta.name == "album"
+    assert meta.total_size == 3000  # the pad file is not counted
+    assert meta.file_count == 2
+
+
+def test_v1_single_file():
+    info = {"name": "a.iso", "length": 123, "piece length": 16384, "pieces": b"x" * 20}
+    meta = TorrentMetainfo(torrent(info))
+    assert meta.info_hash_v1 == hashlib.sha1(bencode(info)).hexdigest()
+    assert (meta.total_size, meta.file_count) == (123, 1)
+
+
+def test_v2():
+    info = {
+        "name": "album",
+        "piece length": 16384,
+        "meta version": 2,
+        "file tree": V2_TREE,
+    }
+    meta = TorrentMetainfo(torrent(info, **{"piece layers": {b"\x02" * 32: b"y" * 64}}))
+    v2 = hashlib.sha256(bencode(info)).hexdigest()
+    assert meta.info_hash_v1 is None
+    assert meta.info_hash_v2 == v2
+    assert meta.hash == v2[:40]
+    assert (meta.total_size, meta.file_count) == (3000, 2)
+
+
+def test_hybrid():
+    info = dict(V1_INFO, **{"meta version": 2, "file tree": V2_TREE})
+    meta = TorrentMetainfo(torrent(info))
+    encoded = bencode(info)
+    assert meta.info_hash_v1 == hashlib.sha1(encoded).hexdigest()
+    assert meta.info_hash_v2 == hashlib.sha256(encoded).hexdigest()
+    assert meta.hash == meta.info_hash_v1
+    assert (meta.total_size, meta.file_count) == (3000, 2)
+
+
+def test_read_metainfo_sources(tmp_path):
+    data = torrent(V1_INFO)
+    expected = hashlib.sha1(bencode(V1_INFO)).hexdigest()
+    path = tmp_path / "album.torrent"
+    path.write_bytes(data)
+    f = io.BytesIO(b"junk" + data)
+    f.seek(4)
+    for source in (data, bytearray(data), memoryview(data), path, str(path), f):
+        assert read_metainfo(source).hash == expected
+    assert f.tell() == 4  # file objects are rewound
+
+
+def test_not_a_torrent():
+    with pytest.raises(ValueError):
+        TorrentMetainfo(bencode({"announce": "x"}))
+    with pytest.raises(ValueError):
+        TorrentMetainfo(bencode({"info": {"name": "x"}}))
+    with pytest.raises(ValueError):
+        TorrentMetainfo(torrent(V1_INFO)[:-10])
@@ -0,0 +1,111 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+
+import pytest
+
+from aioqb.events import (
+    EventBus,
+    StateChanged,
+    TorrentAdded,
+    TorrentCompleted,
+    TorrentRemoved,
+)
+from aioqb.sync import MainDataMirror
+
+A = "a" * 40
+B = "b" * 40
+
+
+def initial(count: int) -> dict:
+    torrents = {"%040x" % i: {"state": "downloading"} for i in range(count)}
+    return {"rid": 1, "full_update": True, "torrents": torrents}
+
+
+def drain(subscription) -> list:
+    events = []
+    while len(subscription):
+        events.append(subscription.get_nowait())
+    return events
+
+
+def test_initial_full_update_only_primes():
+    mirror = MainDataMirror()
+    bus = EventBus(mirror)
+    sub = bus.subscribe(maxsize=16)
+    mirror.apply(initial(20000))
+    assert len(mirror) == 20000
+    assert drain(sub) == [] and sub.dropped == 0
+    mirror.apply({"rid": 2, "torrents": {A: {"state": "metaDL"}}})
+    assert [type(e) for e in drain(sub)] == [TorrentAdded]
+
+
+def test_emit_initial():
+    mirror = MainDataMirror()
+    bus = EventBus(mirror, emit_initial=True)
+    sub = bus.subscribe()
+    mirror.apply(initial(3))
+    assert [type(e) for e in drain(sub)] == [TorrentAdded] * 3
+
+
+def test_events_from_deltas():
+    mirror = MainDataMirror()
+    bus = EventBus(mirror, speed_thresholds={"dlspeed": 100})
+    sub = bus.subscribe()
+    mirror.apply(
+        {"rid": 1, "torrents": {A: {"state": "downloading", "progress": 0.5}, B: {}}}
+    )
+    mirror.apply(
+        {
+            "rid": 2,
+            "torrents": {A: {"state": "uploading", "progress": 1, "dlspeed": 200}},
+            "torrents_removed": [B],
+        }
+    )
+    events = drain(sub)
+    assert [type(e).__name__ for e in events] == [
+        "TorrentCompleted",
+        "StateChanged",
+        "SpeedThresholdCrossed",
+        "TorrentRemoved",
+    ]
+    assert isinstance(events[0], TorrentCompleted)
+    assert isinstance(events[3], TorrentRemoved) and events[3].hash == B
+
+
+def test_conflate_and_types():
+    mirror = MainDataMirror()
+    bus = EventBus(mirror)
+    mirror.apply({"rid": 1, "torrents": {A: {"state": "a"}}})
+    latest = bus.subscribe(conflate=True)
+    states = bus.subscribe(types=[StateChanged])
+    for rid, state in enumerate(("b", "c", "d"), 2):
+        mirror.apply({"rid": rid, "torrents": {A: {"state": state}}})
+    assert [e.new for e in drain(latest)] == ["d"]
+    assert [e.new for e in drain(states)] == ["b", "c", "d"]
+
+
+def test_close_ends_consumers():
+    async def main():
+        mirror = MainDataMirror()
+        bus = EventBus(mirror)
+        mirror.apply({"rid": 1, "torrents": {}})
+        sub = bus.subscribe()
+        got = []
+
+        async def consume():
+            async for event in sub:
+                got.append(event)
+
+        task = asyncio.ensure_future(consume())
+        mirror.apply({"rid": 2, "torrents": {A: {}}})
+        await asyncio.sleep(0)
+        bus.close()
+        await asyncio.wait_for(task, 1)
+        assert [type(e) for e in got] == [TorrentAdded]
+        assert bus.subscriptions == [] and sub.closed
+        with pytest.raises(StopAsyncIteration):
+            await sub.get()
+
+    asyncio.run(main())
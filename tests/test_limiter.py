@@ -0,0 +1,83 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+
+import pytest
+
+from aioqb.limiter import ConcurrencyLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_fixed_caps_in_flight():
+    async def main():
+        limiter = ConcurrencyLimiter(2)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job() for _ in range(10)))
+        assert peak == 2
+        assert limiter.in_flight == 0 and limiter.queue_depth == 0
+
+    run(main())
+
+
+def test_aimd():
+    limiter = ConcurrencyLimiter(4, "aimd", max_limit=8, latency_threshold=0.5)
+    for _ in range(40):
+        limiter.in_flight += 1
+        limiter.release(0.1)
+    assert limiter.limit == 8  # grows up to max_limit
+    limiter.in_flight += 1
+    limiter.release(2.0)
+    assert limiter.limit == 7  # a slow reply backs off
+    limiter.in_flight += 1
+    limiter.release(failed=True)
+    assert limiter.limit == 6
+    assert limiter.in_flight == 0
+
+
+def test_gradient():
+    limiter = ConcurrencyLimiter(8, "gradient", max_limit=32)
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(0.05)
+    grown = limiter.limit
+    assert grown > 8
+    for _ in range(20):
+        limiter.in_flight += 1
+        limiter.release(1.0)  # 20 times the best latency
+    assert limiter.limit < grown
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.parametrize("mode", ["aimd", "gradient"])
+def test_zero_latency(mode):
+    limiter = ConcurrencyLimiter(2, mode)
+    for _ in range(5):
+        limiter.in_flight += 1
+        limiter.release(0.0)  # below the clock resolution
+    assert limiter.in_flight == 0
+    assert limiter.limit >= 2
+
+
+def test_release_frees_the_slot_when_adapting_fails():
+    async def main():
+        limiter = ConcurrencyLimiter(1, "aimd")
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(TypeError):
+            limiter.release("bogus")
+        await asyncio.wait_for(waiter, 1)  # the slot went to the next one
+        assert limiter.in_flight == 1
+
+    run(main())
@@ -0,0 +1,52 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import base64
+import binascii
+import hashlib
+
+from aioqb.magnet import dedupe_urls, magnet_hash, normalize_btih
+
+HEX = hashlib.sha1(b"info").hexdigest()
+BASE32 = base64.b32encode(binascii.unhexlify(HEX)).decode()
+SHA256 = hashlib.sha256(b"info").hexdigest()
+
+
+def test_hex():
+    assert magnet_hash("magnet:?xt=urn:btih:{}&dn=x".format(HEX.upper())) == HEX
+
+
+def test_base32():
+    assert len(BASE32) == 32
+    assert magnet_hash("magnet:?xt=urn:btih:" + BASE32) == HEX
+    assert magnet_hash("magnet:?xt=urn:btih:" + BASE32.lower()) == HEX
+
+
+def test_btmh():
+    v2 = "magnet:?xt=urn:btmh:1220" + SHA256
+    assert magnet_hash(v2) == SHA256[:40]
+    # a hybrid link is known by its v1 hash whatever the order
+    assert magnet_hash(v2 + "&xt=urn:btih:" + HEX) == HEX
+    assert (
+        magnet_hash("magnet:?xt.1=urn:btih:{}&xt.2=urn:btmh:1220{}".format(HEX, SHA256))
+        == HEX
+    )
+
+
+def test_unusable():
+    assert magnet_hash("http://example.com/a.torrent") is None
+    assert magnet_hash("magnet:?dn=nothing") is None
+    assert magnet_hash("magnet:?xt=urn:btih:123") is None
+    assert magnet_hash("magnet:?xt=urn:btmh:1114" + SHA256) is None  # not sha256
+    assert normalize_btih("1" * 32) is None  # not base32
+
+
+def test_dedupe_urls():
+    urls = [
+        "magnet:?xt=urn:btih:" + HEX,
+        "magnet:?xt=urn:btih:{}&dn=again".format(BASE32),
+        "http://example.com/a.torrent",
+        "http://example.com/a.torrent",
+        "magnet:?xt=urn:btmh:1220" + SHA256,
+    ]
+    assert dedupe_urls(urls) == [urls[0], urls[2], urls[4]]
@@ -0,0 +1,71 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import json
+import random
+
+import pytest
+
+from aioqb.stream import JsonArrayParser
+
+ELEMENTS = [
+    {"hash": "a" * 40, "name": 'say "hi"', "tags": "x,y", "progress": 0.5},
+    {"name": "back\\slash", "nested": {"list": [1, [2, 3]], "brace": "}]"}},
+    [],
+    "plain string with , and ] inside",
+    12345,
+    None,
+    {"name": "\\\"", "unicode": "é中"},
+]
+
+
+def parse(body: bytes, sizes) -> list:
+    parser = JsonArrayParser()
+    elements = []
+    pos = 0
+    for size in sizes:
+        elements.extend(parser.feed(body[pos : pos + size]))
+        pos += size
+    elements.extend(parser.feed(body[pos:]))
+    assert parser.done
+    return [json.loads(e) for e in elements]
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunks(seed):
+    body = json.dumps(ELEMENTS, ensure_ascii=False, indent=seed % 3).encode()
+    rng = random.Random(seed)
+    sizes = []
+    while sum(sizes) < len(body):
+        sizes.append(rng.randint(1, 16))
+    assert parse(body, sizes) == ELEMENTS
+
+
+def test_every_split_point():
+    body = json.dumps(ELEMENTS).encode()
+    for i in range(len(body) + 1):
+        assert parse(body, [i]) == ELEMENTS
+
+
+def test_escaped_quote_straddles_chunks():
+    body = b'[{"name": "a\\"b"}, "c\\\\"]'
+    backslash = body.index(b"\\")
+    # the escape ends one chunk, the escaped quote starts the next
+    assert parse(body, [backslash + 1]) == [{"name": 'a"b'}, "c\\"]
+    # same for an escaped backslash right before the closing quote
+    second = body.index(b"\\\\")
+    assert parse(body, [second + 1]) == [{"name": 'a"b'}, "c\\"]
+
+
+def test_byte_by_byte():
+    body = json.dumps(ELEMENTS).encode()
+    assert parse(body, [1] * len(body)) == ELEMENTS
+
+
+def test_empty_array():
+    assert parse(b"[ ]", [1]) == []
+
+
+def test_not_an_array():
+    with pytest.raises(ValueError):
+        JsonArrayParser().feed(b'{"a": 1}')
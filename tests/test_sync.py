@@ -0,0 +1,117 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+from aioqb.sync import MainDataMirror, MirrorListener
+
+A = "a" * 40
+B = "b" * 40
+C = "c" * 40
+
+
+class Recorder(MirrorListener):
+    def __init__(self):
+        self.updated = []
+        self.removed = []
+
+    def torrent_updated(self, hash, torrent, partial):
+        self.updated.append((hash, None if torrent is None else dict(torrent), partial))
+
+    def torrent_removed(self, hash, torrent):
+        self.removed.append(hash)
+
+
+def full_update() -> dict:
+    return {
+        "rid": 1,
+        "full_update": True,
+        "torrents": {
+            A: {"name": "a", "state": "downloading", "progress": 0.1},
+            B: {"name": "b", "state": "pausedUP", "progress": 1},
+        },
+        "categories": {"movies": {"name": "movies", "savePath": "/m"}},
+        "tags": ["x", "y"],
+        "trackers": {"http://t/announce": [A, B]},
+        "server_state": {"dl_info_speed": 10, "free_space_on_disk": 100},
+    }
+
+
+def test_full_update():
+    mirror = MainDataMirror()
+    mirror.apply(full_update())
+    assert mirror.rid == 1
+    assert len(mirror) == 2 and A in mirror
+    assert mirror[A]["progress"] == 0.1
+    assert mirror.categories == {"movies": {"name": "movies", "savePath": "/m"}}
+    assert mirror.tags == {"x", "y"}
+    assert mirror.trackers == {"http://t/announce": [A, B]}
+    assert mirror.server_state["free_space_on_disk"] == 100
+
+
+def test_delta_and_removed_lists():
+    mirror = MainDataMirror()
+    mirror.apply(full_update())
+    mirror.apply(
+        {
+            "rid": 2,
+            "torrents": {A: {"progress": 0.5}, C: {"name": "c"}},
+            "torrents_removed": [B, "missing"],
+            "categories": {"movies": {"savePath": "/movies"}, "tv": {"name": "tv"}},
+            "categories_removed": ["unknown"],
+            "tags": ["z"],
+            "tags_removed": ["x"],
+            "trackers_removed": ["http://t/announce"],
+            "server_state": {"dl_info_speed": 20},
+        }
+    )
+    assert mirror.rid == 2
+    assert set(mirror.torrents) == {A, C}
+    assert mirror[A] == {"name": "a", "state": "downloading", "progress": 0.5}
+    assert mirror.categories["movies"] == {"name": "movies", "savePath": "/movies"}
+    assert set(mirror.categories) == {"movies", "tv"}
+    assert mirror.tags == {"y", "z"}
+    assert mirror.trackers == {}
+    assert mirror.server_state == {"dl_info_speed": 20, "free_space_on_disk": 100}
+
+    mirror.apply({"rid": 3, "categories_removed": ["movies"]})
+    assert set(mirror.categories) == {"tv"}
+
+
+def test_full_update_replaces_state():
+    mirror = MainDataMirror()
+    mirror.apply(full_update())
+    mirror.apply({"rid": 2, "torrents": {A: {"category": "movies"}}, "tags": ["z"]})
+    mirror.apply(
+        {
+            "rid": 3,
+            "full_update": True,
+            "torrents": {A: {"name": "a", "progress": 0.9}},
+            "tags": ["y"],
+        }
+    )
+    # nothing survives a full update unless the server sent it again
+    assert mirror[A] == {"name": "a", "progress": 0.9}
+    assert set(mirror.torrents) == {A}
+    assert mirror.tags == {"y"}
+    assert mirror.categories == {}
+    assert mirror.trackers == {}
+    assert mirror.server_state == {}
+
+
+def test_listeners():
+    mirror = MainDataMirror()
+    recorder = Recorder()
+    mirror.add_listener(recorder)
+    mirror.apply(full_update())
+    mirror.apply(
+        {"rid": 2, "torrents": {A: {"progress": 0.5}}, "torrents_removed": [B]}
+    )
+    mirror.apply({"rid": 3, "full_update": True, "torrents": {C: {"name": "c"}}})
+    assert [(h, t is None) for h, t, _ in recorder.updated] == [
+        (A, True),
+        (B, True),
+        (A, False),
+        (C, True),
+    ]
+    # listeners see the torrent as it was before the delta
+    assert recorder.updated[2][1]["progress"] == 0.1
+    assert recorder.removed == [B, A]
@@ -0,0 +1,108 @@
+"""
+Copyright (c) 2008-2021 synodriver <synodriver@gmail.com>
+"""
+import asyncio
+
+import pytest
+
+from aioqb.exceptions import HashNotFoundException
+from aioqb.sync import MainDataMirror
+from aioqb.waiters import TorrentWaiter
+
+A = "a" * 40
+B = "b" * 40
+
+
+class FakeServer:
+    """
+    Answers sync_maindata from a dict of torrents, counting the polls
+    """
+
+    def __init__(self):
+        self.torrents = {}
+        self.removed = []
+        self.polls = 0
+
+    async def sync_maindata(self, rid: int = 0):
+        self.polls += 1
+        data = {
+            "rid": rid + 1,
+            "torrents": {h: dict(t) for h, t in self.torrents.items()},
+            "torrents_removed": self.removed,
+        }
+        self.removed = []
+        return data
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def waiter_for(server: FakeServer) -> TorrentWaiter:
+    return TorrentWaiter(server, min_interval=0.01, max_interval=0.01)
+
+
+def test_resolves_from_polls():
+    async def main():
+        server = FakeServer()
+        waiter = waiter_for(server)
+
+        async def later():
+            await asyncio.sleep(0.03)
+            server.torrents[A] = {"state": "metaDL", "total_size": -1}
+            await asyncio.sleep(0.03)
+            server.torrents[A].update(state="downloading", total_size=10)
+
+        asyncio.ensure_future(later())
+        result = await waiter.wait(A.upper(), "metadata", timeout=1)
+        assert result[A]["total_size"] == 10
+        assert waiter.pending == 0
+        await waiter.close()
+
+    run(main())
+
+
+def test_repeated_hashes_do_not_leak():
+    async def main():
+        server = FakeServer()
+        waiter = waiter_for(server)
+        with pytest.raises(asyncio.TimeoutError):
+            await waiter.wait([A, A.upper(), "", None], timeout=0.05)
+        assert waiter.pending == 0
+        await asyncio.sleep(0.02)
+        polls = server.polls
+        await asyncio.sleep(0.05)
+        assert server.polls == polls  # the poller stopped
+        await waiter.close()
+
+    run(main())
+
+
+def test_removed_torrent_fails_the_wait():
+    async def main():
+        server = FakeServer()
+        server.torrents[B] = {"progress": 0.5}
+        waiter = waiter_for(server)
+        task = asyncio.ensure_future(waiter.wait(B, "completed", timeout=1))
+        await asyncio.sleep(0.03)
+        del server.torrents[B]
+        server.removed = [B]
+        with pytest.raises(HashNotFoundException):
+            await task
+        await waiter.close()
+
+    run(main())
+
+
+def test_shared_mirror_without_polling():
+    async def main():
+        mirror = MainDataMirror()
+        waiter = TorrentWaiter(mirror=mirror, poll=False)
+        task = asyncio.ensure_future(waiter.wait([A, B], timeout=1))
+        await asyncio.sleep(0)
+        mirror.apply({"rid": 1, "torrents": {A: {}, B: {"name": "b"}}})
+        assert (await task)[B] == {"name": "b"}
+        assert waiter._poller is None
+        await waiter.close()
+
+    run(main())